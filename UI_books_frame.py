@@ -1,7 +1,7 @@
 import threading
 import offline_books 
 import tkinter as tk
-from tkinter import Canvas, Entry, Text, Button
+from tkinter import Canvas, Entry, Text, Button, Listbox
 
 class App:
     def __init__(self, root):
@@ -219,7 +219,41 @@ class App:
             font=("Inter", 18 * -1)
         )
 
-        # --- Large Content Area (Placeholder) ---
+        # --- Book List (Table of books in index.json) ---
+        self.book_list = Listbox(
+            self.main_canvas,
+            bd=1,
+            bg="#FFFFFF",
+            fg="#212121",
+            highlightthickness=1,
+            highlightcolor="#E0E0E0",
+            highlightbackground="#E0E0E0",
+            selectbackground="#0D63F7",
+            relief="flat",
+            exportselection=False,
+            font=("Inter", 12)
+        )
+        self.book_list.place(x=50.0, y=220.0, width=280.0, height=300.0)
+        self.book_list.bind("<<ListboxSelect>>", self.on_book_selected)
+
+        # --- Chapter List (Table of contents of the selected book) ---
+        self.chapter_list = Listbox(
+            self.main_canvas,
+            bd=1,
+            bg="#FFFFFF",
+            fg="#212121",
+            highlightthickness=1,
+            highlightcolor="#E0E0E0",
+            highlightbackground="#E0E0E0",
+            selectbackground="#0D63F7",
+            relief="flat",
+            exportselection=False,
+            font=("Inter", 12)
+        )
+        self.chapter_list.place(x=50.0, y=530.0, width=280.0, height=340.0)
+        self.chapter_list.bind("<<ListboxSelect>>", self.on_chapter_selected)
+
+        # --- Large Content Area (Only the current chapter is shown) ---
         self.content_area = Text(
             self.main_canvas,
             bd=1,
@@ -229,16 +263,21 @@ class App:
             highlightcolor="#E0E0E0",
             highlightbackground="#E0E0E0",
             relief="flat",
+            wrap="word",
             font=("Inter", 14)
         )
         self.content_area.place(
-            x=50.0, y=220.0,
-            width=1080.0,
+            x=340.0, y=220.0,
+            width=790.0,
             height=650.0
         )
         self.content_area.insert("1.0", "Loading your books...")
         self.content_area.config(state="disabled")
-        
+
+        # Books are opened and chapters parsed only when selected
+        self.library = offline_books.BookLibrary()
+        self.current_book = None
+
         # --- Automatically load books on startup ---
         self.start_loading_books()
 
@@ -250,48 +289,125 @@ class App:
         self.content_area.insert("1.0", text)
         self.content_area.config(state="disabled")
 
-    # --- NEW Book Loading Functions (replaces search functions) ---
-    
+    # --- Book Loading Functions (lazy, one chapter at a time) ---
+
+    def run_in_thread(self, target, *args):
+        """Runs a blocking file I/O task in a new thread so the UI doesn't freeze."""
+        thread = threading.Thread(target=target, args=args)
+        thread.daemon = True # Allows app to close
+        thread.start()
+
     def start_loading_books(self):
         """
-        Starts loading books in a new thread.
+        Starts loading the book list in a new thread.
         This runs on the main UI thread.
         """
         self.update_content_area("Loading your downloaded books...")
-        
-        # Run the blocking file I/O task in a new thread
-        load_thread = threading.Thread(
-            target=self.run_book_loader_thread
-        )
-        load_thread.daemon = True # Allows app to close
-        load_thread.start()
+        self.book_list.delete(0, tk.END)
+        self.chapter_list.delete(0, tk.END)
+        self.current_book = None
+        self.run_in_thread(self.run_book_loader_thread)
 
     def run_book_loader_thread(self):
         """
-        Runs the actual book loading from files.
+        Reads the book metadata only (no book files are opened).
         This runs on a separate background thread.
         """
         try:
-            # This is our new function from offline_books.py
-            results = offline_books.get_all_downloaded_books_text()
+            self.library.load()
+            if self.library.metas:
+                message = "Select a book to start reading."
+            else:
+                message = "No books found in index.json. Please run the download script."
+        except FileNotFoundError:
+            message = (f"Error: index.json not found.\n\n"
+                       f"Please run offline_books.py from your terminal first to download books:\n"
+                       f"python offline_books.py --query \"some query\"")
         except Exception as e:
-            results = f"An unexpected error occurred while loading books: {e}"
-        
+            message = f"An unexpected error occurred while loading books: {e}"
+
         # When done, schedule the UI update back on the main thread
-        self.root.after(0, self.finish_loading_books, results)
+        self.root.after(0, self.finish_loading_books, message)
+
+        # Extract the books across all cores in the background; each one
+        # is marked ready as soon as it lands in the text cache
+        try:
+            for book_idx in self.library.prepare_books():
+                self.root.after(0, self.mark_book_ready, book_idx)
+        except Exception as e:
+            print(f"Could not prepare books: {e}")
 
-    def finish_loading_books(self, results):
+    def finish_loading_books(self, message):
         """
-        Updates the UI with results once the thread is done.
+        Fills the book list once the thread is done.
+        Books are greyed out until they are extracted.
         This runs back on the main UI thread.
         """
-        self.update_content_area(results)
+        for meta in self.library.metas:
+            self.book_list.insert(tk.END, offline_books.BookLibrary.label(meta))
+            self.book_list.itemconfig(tk.END, fg="#A0A0A0")
+        self.update_content_area(message)
+
+    def mark_book_ready(self, book_idx):
+        """Shows a book as ready to open instantly."""
+        if book_idx < self.book_list.size():
+            self.book_list.itemconfig(book_idx, fg="#212121")
+
+    def on_book_selected(self, event=None):
+        """Loads the table of contents of the selected book."""
+        selection = self.book_list.curselection()
+        if not selection or selection[0] == self.current_book:
+            return
+        self.current_book = selection[0]
+        self.chapter_list.delete(0, tk.END)
+        self.update_content_area("Opening book...")
+        self.run_in_thread(self.run_toc_thread, self.current_book)
+
+    def run_toc_thread(self, book_idx):
+        try:
+            toc = self.library.table_of_contents(book_idx)
+        except Exception as e:
+            toc = []
+            print(f"Could not open book {book_idx}: {e}")
+        self.root.after(0, self.finish_toc, book_idx, toc)
+
+    def finish_toc(self, book_idx, toc):
+        if book_idx != self.current_book:
+            return # The user picked another book meanwhile
+        if not toc:
+            meta = self.library.metas[book_idx]
+            self.update_content_area(f"[Could not read or parse book file: {meta.get('downloaded_file')}]")
+            return
+        for title in toc:
+            self.chapter_list.insert(tk.END, title)
+        self.chapter_list.selection_set(0)
+        self.on_chapter_selected()
+
+    def on_chapter_selected(self, event=None):
+        """Parses and shows only the selected chapter."""
+        selection = self.chapter_list.curselection()
+        if not selection or self.current_book is None:
+            return
+        self.run_in_thread(self.run_chapter_thread, self.current_book, selection[0])
+
+    def run_chapter_thread(self, book_idx, chapter_idx):
+        text = self.library.chapter_text(book_idx, chapter_idx)
+        self.root.after(0, self.finish_chapter, book_idx, chapter_idx, text)
+
+    def finish_chapter(self, book_idx, chapter_idx, text):
+        selection = self.chapter_list.curselection()
+        if book_idx != self.current_book or not selection or selection[0] != chapter_idx:
+            return # Stale result, another chapter was selected
+        self.update_content_area(text.strip() or "[This section has no text]")
 
     # --- END of new functions ---
 
     def clear_storage(self):
         """Clears the main content text area."""
         # Use your existing helper function to clear the text box
+        self.book_list.delete(0, tk.END)
+        self.chapter_list.delete(0, tk.END)
+        self.current_book = None
         self.update_content_area("Storage cleared. Click 'Books' to reload.")
         # Removed search bar reset logic
         self.root.focus_set()
@@ -0,0 +1,115 @@
+"""
+article_store.py
+Local on-disk store of BBC Travel articles, so searches can run offline.
+
+Articles are keyed by URL and keep the extracted text and title, when they
+were fetched, and the ETag / Last-Modified headers needed for conditional
+refreshes.
+
+Usage:
+  # Crawl BBC Travel and update the store (new pages + conditional GETs)
+  python article_store.py --refresh
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import sqlite_db
+from search_index import SearchIndex
+
+DEFAULT_STORE_PATH = Path.home() / "bbc_travel" / "articles.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url           TEXT PRIMARY KEY,
+    title         TEXT NOT NULL DEFAULT '',
+    text          TEXT NOT NULL,
+    fetched_at    REAL NOT NULL,
+    etag          TEXT,
+    last_modified TEXT
+)
+"""
+
+_COLUMNS = ("url", "title", "text", "fetched_at", "etag", "last_modified")
+
+
+class ArticleStore:
+    """
+    SQLite backed article store. Every stored article is also kept in the
+    full-text search index.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH, index: Optional[SearchIndex] = None):
+        self.path = Path(path)
+        self.index = index if index is not None else SearchIndex()
+        sqlite_db.create(self.path, [_SCHEMA])
+
+    def __len__(self) -> int:
+        return sqlite_db.count(self.path, "articles")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with sqlite_db.connect(self.path) as db:
+            row = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM articles WHERE url = ?", (url,)).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def put(self, article: Dict[str, Any]) -> None:
+        """ Insert or replace an article dict (see _COLUMNS for the keys) """
+        record = {k: article.get(k) for k in _COLUMNS}
+        record["title"] = record["title"] or ""
+        if record["fetched_at"] is None:
+            record["fetched_at"] = time.time()
+        with sqlite_db.connect(self.path) as db:
+            sqlite_db.insert_or_replace(db, "articles", _COLUMNS, record)
+        self._index_article(record)
+
+    def _index_article(self, record: Dict[str, Any]) -> bool:
+        # 304 refreshes re-put the same text, the hash keeps those from re-indexing
+        signature = hashlib.sha1(record["text"].encode("utf-8")).hexdigest()
+        return self.index.update(record["url"], "article", record["title"], record["text"], signature)
+
+    def reindex(self) -> int:
+        """ Brings the search index up to date with every stored article """
+        return sum(1 for article in self.all() if self._index_article(article))
+
+    def all(self) -> List[Dict[str, Any]]:
+        with sqlite_db.connect(self.path) as db:
+            rows = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM articles ORDER BY fetched_at DESC").fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def search(self, term: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Returns stored articles matching every word of term, best match first.
+        A blank term returns everything, newest first.
+        """
+        if not term.strip():
+            return self.all()
+        hits = self.index.search(term, kind="article", limit=limit)
+        articles = [self.get(hit["doc_id"]) for hit in hits]
+        return [a for a in articles if a]
+
+
+# --- CLI ---------------------------------------------------------------------
+
+def main():
+    ap = argparse.ArgumentParser(description="Manage the offline BBC Travel article store")
+    ap.add_argument("--store", type=Path, default=DEFAULT_STORE_PATH, help="path of the article database")
+    ap.add_argument("--refresh", action="store_true", help="crawl BBC Travel and update the store")
+    ap.add_argument("--reindex", action="store_true", help="rebuild search index entries for stored articles")
+    args = ap.parse_args()
+
+    store = ArticleStore(args.store)
+    if args.reindex:
+        print(f"Re-indexed {store.reindex()} articles")
+    if args.refresh:
+        # Imported here since travel_articles itself depends on this module
+        import travel_articles
+        print(travel_articles.refresh_store(store))
+    print(f"{len(store)} articles stored in {store.path}")
+
+
+if __name__ == "__main__":
+    main()
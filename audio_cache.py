@@ -0,0 +1,72 @@
+"""
+Extract the audio track of downloaded shorts once and keep it in a cache.
+
+Cached files are named after a fingerprint of the video's content, so a
+renamed or re-downloaded copy of the same video reuses the same WAV.
+"""
+
+import hashlib
+import os
+
+import moviepy
+
+AUDIO_CACHE_DIR = "cache/"
+
+# Bytes read from each end of the video to fingerprint it
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def fingerprint(video_path: str) -> str:
+    """ Cheap content hash: file size plus the first and last 64 KiB """
+
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(video_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def audio_path_for(video_path: str) -> str:
+    return os.path.join(AUDIO_CACHE_DIR, fingerprint(video_path) + ".wav")
+
+
+def extract_audio(video_path: str, audio_path: str):
+    """ Decode the video's audio track into a WAV file """
+
+    video_clip = moviepy.VideoFileClip(video_path)
+
+    # Extract the audio from the video clip
+    audio_clip = video_clip.audio
+    if audio_clip is None:
+        video_clip.close()
+        raise ValueError(f"{video_path} has no audio track")
+
+    if not os.path.exists(os.path.dirname(audio_path)):
+        print(f"{os.path.dirname(audio_path)} does not exist. Creating it")
+        os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+
+    # Write to a temporary name first, so a half written WAV is never picked up
+    tmp_path = audio_path + ".tmp.wav"
+    try:
+        audio_clip.write_audiofile(tmp_path, logger=None)
+        os.replace(tmp_path, audio_path)
+    finally:
+        audio_clip.close()
+        video_clip.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def ensure_audio(video_path: str) -> str:
+    """
+    Return the cached WAV for video_path, extracting it first if it is
+    missing or older than the video.
+    """
+
+    audio_path = audio_path_for(video_path)
+    if not (os.path.exists(audio_path) and os.path.getmtime(audio_path) >= os.path.getmtime(video_path)):
+        extract_audio(video_path, audio_path)
+    return audio_path
@@ -0,0 +1,128 @@
+"""
+bench_parsing.py
+Micro-benchmark of the HTML parser backends in html_parsing.py.
+
+Runs article extraction over saved BBC Travel pages (*.html) and chapter text
+extraction over Gutenberg EPUBs (*.epub) with every backend, reports the time
+per backend and checks the extracted text matches html.parser's (ignoring
+whitespace differences). A few non-ASCII chapters in different declared
+encodings are always part of the chapter check.
+
+Usage:
+  # Save the current BBC Travel candidate pages into ./corpus
+  python bench_parsing.py --fetch-bbc --corpus ./corpus
+
+  # Benchmark (downloaded books can be copied or linked into the corpus)
+  python bench_parsing.py --corpus ./corpus --repeat 3
+"""
+
+from __future__ import annotations
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import ebooklib
+from ebooklib import epub
+
+import html_parsing
+import travel_articles
+
+# Non-ASCII chapters in the ways EPUBs declare (or don't declare) their encoding,
+# always added to the chapter check so a charset bug shows up as a text mismatch
+ENCODING_SAMPLES: List[bytes] = [
+    '<?xml version="1.0" encoding="utf-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml"><body>'
+    '<p>Café — naïve “quotes”, Ærøskøbing, Dvořák, Łódź</p></body></html>'.encode("utf-8"),
+    '<html><body><p>No declaration: déjà vu, œuvre, 東京</p></body></html>'.encode("utf-8"),
+    '<?xml version="1.0" encoding="iso-8859-1"?>\n<html><body><p>Façade, señor, Müller</p></body></html>'.encode("latin-1"),
+    '<html><head><meta charset="windows-1252"/></head><body><p>“Smart” quotes – and dashes…</p></body></html>'.encode("cp1252"),
+]
+
+
+def _time(fn: Callable[[], str], repeat: int) -> Tuple[float, str]:
+    """ Best of repeat runs, in seconds, plus the last output """
+    best, out = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def bench_pages(pages: List[bytes], repeat: int) -> None:
+    print(f"\n{len(pages)} BBC pages (parse + article check + text extraction)")
+    reference: Dict[int, str] = {}
+    for parser in reversed(html_parsing.PARSERS):  # html.parser first, it is the reference
+        total, mismatches = 0.0, 0
+        for i, page in enumerate(pages):
+            def run():
+                soup = html_parsing.make_soup(page, parser)
+                travel_articles._is_article_soup(soup)
+                return travel_articles._extract_article_text(soup)
+            secs, text = _time(run, repeat)
+            total += secs
+            text = html_parsing.normalize_text(text)
+            reference.setdefault(i, text)
+            mismatches += text != reference[i]
+        print(f"  {parser:12} {total * 1000:9.1f} ms   text differs on {mismatches} pages")
+
+
+def bench_chapters(chapters: List[bytes], repeat: int) -> None:
+    print(f"\n{len(chapters)} EPUB chapters (plain text extraction)")
+    reference: Dict[int, str] = {}
+    backends = ["html.parser"] + [p for p in html_parsing.PARSERS if p != "html.parser"]
+    if html_parsing.etree is not None:
+        backends.append("stream")
+    for parser in backends:
+        total, mismatches = 0.0, 0
+        for i, chapter in enumerate(chapters):
+            secs, text = _time(lambda: html_parsing.html_to_text(chapter, parser), repeat)
+            total += secs
+            text = html_parsing.normalize_text(text)
+            reference.setdefault(i, text)
+            mismatches += text != reference[i]
+        print(f"  {parser:12} {total * 1000:9.1f} ms   text differs on {mismatches} chapters")
+
+
+def fetch_bbc(corpus: Path) -> None:
+    corpus.mkdir(parents=True, exist_ok=True)
+    for n, link in enumerate(travel_articles._candidate_links()):
+        try:
+            r = travel_articles._fetch(link, timeout=12)
+        except travel_articles.requests.RequestException:
+            continue
+        (corpus / f"bbc_{n:02}.html").write_bytes(r.content)
+        print(f"Saved {link}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark HTML parser backends")
+    ap.add_argument("--corpus", type=Path, default=Path("corpus"), help="folder with *.html pages and *.epub books")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per document, the best one counts")
+    ap.add_argument("--fetch-bbc", action="store_true", help="save the current BBC Travel pages into the corpus and exit")
+    args = ap.parse_args()
+
+    if args.fetch_bbc:
+        fetch_bbc(args.corpus)
+        return
+
+    pages = [p.read_bytes() for p in sorted(args.corpus.glob("*.htm*"))]
+    chapters = []
+    for book_path in sorted(args.corpus.rglob("*.epub")):
+        try:
+            book = epub.read_epub(str(book_path))
+        except Exception as e:
+            print(f"[skip] {book_path}: {e}")
+            continue
+        chapters.extend(item.get_content() for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT))
+
+    if not pages and not chapters:
+        ap.error(f"no *.html or *.epub files in {args.corpus}")
+    print(f"Backends available: {', '.join(html_parsing.PARSERS)}")
+    if pages:
+        bench_pages(pages, args.repeat)
+    bench_chapters(chapters + ENCODING_SAMPLES, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+downloader.py
+Resumable file downloads shared by youtube.py and offline_books.py.
+
+Data is streamed into "<path>.part". If the connection drops, the download is
+retried from where it stopped with an HTTP Range request, and a .part file
+left by an earlier run is resumed the same way. "<path>.part.json" records the
+url and the ETag / Last-Modified the .part came from; resumes send it as
+If-Range, so a file that changed on the server is downloaded again instead of
+appended to the old bytes. Once complete the file is checked against the
+expected size (and sha256 if given) and renamed into place.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+import http_client
+
+CHUNK_SIZE = 256 * 1024  # bytes held in memory per download
+
+
+class DownloadError(requests.RequestException):
+    """ The download finished but failed size or checksum verification """
+
+
+def _total_size(response: requests.Response, offset: int) -> Optional[int]:
+    """ Full size of the file from Content-Range / Content-Length, if known """
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None  # the lengths count encoded bytes, not what is written
+    content_range = response.headers.get("Content-Range", "")
+    match = re.search(r"/(\d+)$", content_range)
+    if match:
+        return int(match.group(1))
+    length = response.headers.get("Content-Length")
+    if length is None:
+        return None
+    return int(length) + (offset if response.status_code == 206 else 0)
+
+
+def _read_state(state_path: str) -> Dict[str, Any]:
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(state_path: str, url: str, response: requests.Response, total: Optional[int]) -> None:
+    """ Remembers which url and version of the file the .part holds """
+    state = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "total": total,
+    }
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def _discard(*paths: str) -> None:
+    for p in paths:
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download(
+    url: str,
+    path: str,
+    expected_size: Optional[int] = None,
+    sha256: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    retries: int = 5,
+    timeout: float = 60,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    Download url to path, resuming from path + ".part" when possible.
+    Raises requests.RequestException (DownloadError on a bad size/checksum).
+    Returns path.
+    """
+    part_path = str(path) + ".part"
+    state_path = part_path + ".json"
+    total = expected_size
+
+    # A .part left by an earlier run is only resumed if we know it came from this
+    # url and have a validator to check it is still the same file
+    state = _read_state(state_path)
+    if state.get("url") != url or not (state.get("etag") or state.get("last_modified")):
+        _discard(part_path, state_path)
+        state = {}
+    total = total or state.get("total")
+
+    for attempt in range(retries + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = dict(headers or {})
+        # Compressed transfers would make Content-Length / Range count other bytes than we write
+        request_headers["Accept-Encoding"] = "identity"
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+            validator = state.get("etag") or state.get("last_modified")
+            if validator:
+                # The server sends the whole file (200) instead if it changed
+                request_headers["If-Range"] = validator
+
+        try:
+            with http_client.get(url, headers=request_headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416 and offset:
+                    if total is not None and offset == total:
+                        break  # nothing left to send, the .part file is already complete
+                    # Can't tell what the .part holds, start over
+                    _discard(part_path, state_path)
+                    state = {}
+                    reason = "range not satisfiable"
+                    continue
+                response.raise_for_status()
+
+                if response.status_code != 206:
+                    offset = 0  # server ignored the Range header or the file changed, start over
+                total = _total_size(response, offset) or total
+                if response.status_code != 206 or not state:
+                    _write_state(state_path, url, response, total)
+                    state = _read_state(state_path)
+
+                with open(part_path, "ab" if offset else "wb") as writer:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        writer.write(chunk)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == retries:
+                raise
+            reason = e
+        else:
+            size = os.path.getsize(part_path)
+            if total is None or size >= total or attempt == retries:
+                break
+            reason = "connection closed early"
+
+        resumed = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        print(f"Download interrupted at {resumed} bytes ({reason}), resuming...")
+        time.sleep(min(2 ** attempt, 30))
+
+    if not os.path.exists(part_path):
+        raise DownloadError(f"{url}: nothing was downloaded")
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        if size > total:
+            _discard(part_path, state_path)  # can't be resumed, start clean next time
+        raise DownloadError(f"{url}: got {size} bytes, expected {total}")
+    if sha256 and _sha256(part_path) != sha256.lower():
+        _discard(part_path, state_path)
+        raise DownloadError(f"{url}: checksum mismatch")
+
+    os.replace(part_path, path)
+    _discard(state_path)
+    return str(path)
@@ -0,0 +1,327 @@
+"""
+gutenberg_catalog.py
+Local mirror of the Project Gutenberg catalog, so books can be searched
+(and a download queue built) without a network connection.
+
+The catalog is a SQLite file with one row per book in the same shape Gutendex
+returns, plus an FTS5 index over title, authors and subjects. It can be filled
+from Gutendex pages or from Gutenberg's RDF dump (rdf-files.tar.bz2, see
+https://www.gutenberg.org/cache/epub/feeds/).
+
+Usage:
+  # Import or refresh from Gutendex (only new books are fetched after the first run)
+  python gutenberg_catalog.py --refresh
+
+  # Import from a downloaded RDF dump
+  python gutenberg_catalog.py --import-rdf rdf-files.tar.bz2
+
+  # Search locally
+  python gutenberg_catalog.py --search "jules verne"
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import re
+import tarfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import sqlite_db
+
+DEFAULT_CATALOG_PATH = Path.home() / "gutenberg_books" / "catalog.db"
+GUTENDEX = "https://gutendex.com/books"
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS books (
+        id             INTEGER PRIMARY KEY,
+        title          TEXT NOT NULL DEFAULT '',
+        authors        TEXT NOT NULL DEFAULT '[]',  -- JSON, Gutendex shape
+        languages      TEXT NOT NULL DEFAULT '',    -- ",en,fr," for LIKE filters
+        subjects       TEXT NOT NULL DEFAULT '[]',  -- JSON list
+        formats        TEXT NOT NULL DEFAULT '{}',  -- JSON {mime: url}
+        download_count INTEGER NOT NULL DEFAULT 0,
+        is_novel       INTEGER NOT NULL DEFAULT 0,
+        updated_at     REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS books_downloads ON books (download_count DESC)",
+    # rowid of each row is books.id
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(title, authors, subjects, tokenize='unicode61 remove_diacritics 2')",
+    # import progress: "complete" once a whole catalog is in, "gutendex_next" while a full import is under way
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+_COLUMNS = ("id", "title", "authors", "languages", "subjects", "formats", "download_count", "is_novel", "updated_at")
+
+
+def _match_query(text: str) -> str:
+    """ Every word must match (as a prefix) """
+    return " ".join(f'"{w}"*' for w in re.findall(r"\w+", text.lower()))
+
+
+class Catalog:
+    """ SQLite catalog of Gutenberg books with indexed title/author/subject search """
+
+    def __init__(self, path: Path = DEFAULT_CATALOG_PATH):
+        self.path = Path(path)
+        sqlite_db.create(self.path, _SCHEMA)
+
+    def __len__(self) -> int:
+        return sqlite_db.count(self.path, "books")
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with sqlite_db.connect(self.path) as db:
+            row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: Optional[str]) -> None:
+        """ Stores value under key, None removes the key """
+        with sqlite_db.connect(self.path) as db:
+            if value is None:
+                db.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                sqlite_db.insert_or_replace(db, "meta", ("key", "value"), {"key": key, "value": value})
+
+    def is_complete(self) -> bool:
+        """ True once a full import (all of Gutendex or an RDF dump) has finished """
+        return self.get_meta("complete") == "1"
+
+    def max_id(self) -> int:
+        with sqlite_db.connect(self.path) as db:
+            return db.execute("SELECT COALESCE(MAX(id), 0) FROM books").fetchone()[0]
+
+    def upsert(self, books: List[Dict[str, Any]]) -> int:
+        """ Adds or replaces Gutendex-shaped book dicts, returns how many were new """
+        new = 0
+        now = time.time()
+        with sqlite_db.connect(self.path) as db:
+            for b in books:
+                book_id = b.get("id")
+                if book_id is None:
+                    continue
+                authors = b.get("authors") or []
+                subjects = b.get("subjects") or []
+                author_names = " ".join(a.get("name", "") for a in authors)
+                exists = db.execute("SELECT 1 FROM books WHERE id = ?", (book_id,)).fetchone()
+                new += exists is None
+                sqlite_db.insert_or_replace(db, "books", _COLUMNS, {
+                    "id": book_id,
+                    "title": b.get("title") or "",
+                    "authors": json.dumps(authors, ensure_ascii=False),
+                    "languages": "," + ",".join(b.get("languages") or []) + ",",
+                    "subjects": json.dumps(subjects, ensure_ascii=False),
+                    "formats": json.dumps(b.get("formats") or {}, ensure_ascii=False),
+                    "download_count": b.get("download_count") or 0,
+                    "is_novel": int(any("novel" in s.lower() for s in subjects)),
+                    "updated_at": now,
+                })
+                db.execute("DELETE FROM books_fts WHERE rowid = ?", (book_id,))
+                db.execute(
+                    "INSERT INTO books_fts (rowid, title, authors, subjects) VALUES (?, ?, ?, ?)",
+                    (book_id, b.get("title") or "", author_names, " ".join(subjects)),
+                )
+        return new
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        author: Optional[str] = None,
+        lang: Optional[str] = "en",
+        limit: int = 5,
+        require_novel: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns up to limit Gutendex-shaped book dicts matching every word of
+        query (title/authors/subjects) and of author, most downloaded first
+        like Gutendex.
+        """
+        where, params = [], []
+        match = []
+        query_match = _match_query(query) if query else ""
+        if query_match:  # empty for a query without words, such as "!!"
+            match.append(query_match)
+        if author:
+            match.extend(f"authors : {term}" for term in _match_query(author).split())
+        if match:
+            where.append("b.id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)")
+            params.append(" ".join(match))
+        if lang:
+            where.append("b.languages LIKE ?")
+            params.append(f"%,{lang},%")
+
+        def run(extra: List[str]) -> List[Dict[str, Any]]:
+            clauses = where + extra
+            sql = "SELECT b.id, b.title, b.authors, b.languages, b.subjects, b.formats, b.download_count FROM books b"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY b.download_count DESC LIMIT ?"
+            with sqlite_db.connect(self.path) as db:
+                rows = db.execute(sql, params + [limit]).fetchall()
+            return [
+                {
+                    "id": r[0],
+                    "title": r[1],
+                    "authors": json.loads(r[2]),
+                    "languages": [l for l in r[3].split(",") if l],
+                    "subjects": json.loads(r[4]),
+                    "formats": json.loads(r[5]),
+                    "download_count": r[6],
+                }
+                for r in rows
+            ]
+
+        if require_novel:
+            # same fallback as the live search: unfiltered if nothing is a novel
+            return run(["b.is_novel = 1"]) or run([])
+        return run([])
+
+
+# --- Importers ---------------------------------------------------------------
+
+def import_gutendex(catalog: Catalog, full: bool = False, max_pages: Optional[int] = None) -> int:
+    """
+    Pages through Gutendex newest first, adding books to the catalog.
+
+    Until the catalog is complete this is a full import: the next page url is
+    saved after every page, so an interrupted import resumes where it stopped,
+    and the catalog is marked complete when the last page is in. Once
+    complete, refreshes stop at the first page holding only books the
+    catalog already has, so they fetch just the new books. full restarts a
+    full import from the first page.
+    Returns how many new books were added.
+    """
+    import http_client  # only needed when importing
+
+    full_pass = full or not catalog.is_complete()
+    cursor = None if full else catalog.get_meta("gutendex_next")
+    known_max = 0 if full_pass else catalog.max_id()
+    url: Optional[str] = cursor or GUTENDEX
+    params: Optional[Dict[str, Any]] = None if cursor else {"sort": "descending"}
+    if cursor:
+        print(f"Resuming the catalog import from {cursor}")
+    added, pages = 0, 0
+    while url and (max_pages is None or pages < max_pages):
+        r = http_client.get(url, params=params, timeout=30, headers={"User-Agent": "GutenHack/1.0 (+noncommercial demo)"})
+        r.raise_for_status()
+        payload = r.json()
+        page_books = payload.get("results", [])
+        added += catalog.upsert(page_books)
+        pages += 1
+        print(f"Imported page {pages} ({added} new books)")
+        url, params = payload.get("next"), None  # the next url carries the parameters
+        if full_pass:
+            catalog.set_meta("gutendex_next", url)
+        elif all(b.get("id", 0) <= known_max for b in page_books):
+            break
+    if full_pass and not url:
+        catalog.set_meta("complete", "1")
+    return added
+
+
+_NS = {
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "dcterms": "http://purl.org/dc/terms/",
+    "pgterms": "http://www.gutenberg.org/2009/pgterms/",
+}
+
+
+def _parse_rdf(data: bytes) -> Optional[Dict[str, Any]]:
+    """ Turns one Gutenberg RDF record into a Gutendex-shaped book dict """
+    root = ET.fromstring(data)
+    ebook = root.find("pgterms:ebook", _NS)
+    if ebook is None:
+        return None
+    about = ebook.get(f"{{{_NS['rdf']}}}about", "")
+    match = re.search(r"(\d+)$", about)
+    if not match:
+        return None
+
+    def values(path: str) -> List[str]:
+        return [el.text.strip() for el in ebook.findall(path, _NS) if el.text and el.text.strip()]
+
+    formats = {}
+    for f in ebook.findall("dcterms:hasFormat/pgterms:file", _NS):
+        url = f.get(f"{{{_NS['rdf']}}}about")
+        for mime in f.findall("dcterms:format/rdf:Description/rdf:value", _NS):
+            if url and mime.text:
+                formats.setdefault(mime.text.strip(), url)
+
+    downloads = values("pgterms:downloads")
+    return {
+        "id": int(match.group(1)),
+        "title": " ".join(values("dcterms:title")[:1]).replace("\n", " "),
+        "authors": [{"name": n} for n in values("dcterms:creator/pgterms:agent/pgterms:name")],
+        "languages": values("dcterms:language/rdf:Description/rdf:value"),
+        "subjects": values("dcterms:subject/rdf:Description/rdf:value"),
+        "formats": formats,
+        "download_count": int(downloads[0]) if downloads and downloads[0].isdigit() else 0,
+    }
+
+
+def _iter_rdf_dump(path: Path) -> Iterator[Dict[str, Any]]:
+    with tarfile.open(path, "r:*") as tar:
+        for member in tar:
+            if not member.isfile() or not member.name.endswith(".rdf"):
+                continue
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+            try:
+                book = _parse_rdf(f.read())
+            except ET.ParseError:
+                continue
+            if book:
+                yield book
+
+
+def import_rdf_dump(catalog: Catalog, path: Path, batch: int = 1000) -> int:
+    """ Imports Gutenberg's rdf-files.tar.bz2 (or .tar/.tar.gz); returns how many books were new """
+    added, pending = 0, []
+    for book in _iter_rdf_dump(path):
+        pending.append(book)
+        if len(pending) >= batch:
+            added += catalog.upsert(pending)
+            pending = []
+            print(f"Imported {added} books...")
+    added += catalog.upsert(pending)
+    # The dump holds the whole catalog, later Gutendex refreshes only need new books
+    catalog.set_meta("complete", "1")
+    catalog.set_meta("gutendex_next", None)
+    return added
+
+
+# --- CLI ---------------------------------------------------------------------
+
+def main():
+    ap = argparse.ArgumentParser(description="Local Project Gutenberg catalog")
+    ap.add_argument("--catalog", type=Path, default=DEFAULT_CATALOG_PATH, help="path of the catalog database")
+    ap.add_argument("--refresh", action="store_true", help="add new books from Gutendex")
+    ap.add_argument("--full", action="store_true", help="with --refresh, restart the import from the first Gutendex page")
+    ap.add_argument("--import-rdf", type=Path, default=None, help="import Gutenberg's rdf-files.tar.bz2")
+    ap.add_argument("--search", type=str, default=None, help="search the catalog")
+    ap.add_argument("--lang", type=str, default="en", help="language code (default: en)")
+    ap.add_argument("--limit", type=int, default=10, help="number of results to show")
+    args = ap.parse_args()
+
+    catalog = Catalog(args.catalog)
+    if args.import_rdf:
+        print(f"Added {import_rdf_dump(catalog, args.import_rdf)} books from {args.import_rdf}")
+    if args.refresh:
+        print(f"Added {import_gutendex(catalog, full=args.full)} books from Gutendex")
+    if args.search:
+        start = time.perf_counter()
+        books = catalog.search(args.search, lang=args.lang, limit=args.limit)
+        print(f"{len(books)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for b in books:
+            authors = ", ".join(a.get("name", "") for a in b["authors"]) or "Unknown"
+            print(f"  [{b['id']}] {b['title']} by {authors}")
+    state = "complete" if catalog.is_complete() else "import not finished, run --refresh to resume"
+    print(f"{len(catalog)} books in {catalog.path} ({state})")
+
+
+if __name__ == "__main__":
+    main()
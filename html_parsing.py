@@ -0,0 +1,114 @@
+"""
+html_parsing.py
+Pluggable HTML parsing for article pages and EPUB chapters.
+
+lxml's C parser is used when it is installed, otherwise the pure Python
+html.parser. EPUB chapters only need their plain text, so they go through a
+streaming lxml parser target that never builds a tree at all.
+"""
+
+from __future__ import annotations
+import re
+from typing import List, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, fall back to html.parser
+    etree = None
+
+PARSERS = ["lxml", "html.parser"] if etree is not None else ["html.parser"]
+DEFAULT_PARSER = PARSERS[0]
+
+# Elements whose text BeautifulSoup's get_text() leaves out
+_SKIP_TAGS = {"script", "style", "template"}
+
+
+def make_soup(markup: Union[str, bytes], parser: str = DEFAULT_PARSER) -> BeautifulSoup:
+    """ Parses markup into a BeautifulSoup document with the given backend """
+    return BeautifulSoup(markup, parser)
+
+
+class _TextTarget:
+    """
+    lxml parser target that keeps only character data, in document order.
+    The parser streams events into it, so no element tree is ever built.
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.skipping = 0
+
+    def start(self, tag, attrib):
+        if tag.lower() in _SKIP_TAGS:
+            self.skipping += 1
+
+    def end(self, tag):
+        if tag.lower() in _SKIP_TAGS and self.skipping:
+            self.skipping -= 1
+
+    def data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self) -> str:
+        return "".join(self.parts)
+
+
+_XML_ENCODING = re.compile(rb"""^\s*<\?xml[^>]*?encoding\s*=\s*["']([\w.:-]+)""", re.I)
+_META_CHARSET = re.compile(rb"""<meta[^>]*?charset\s*=\s*["']?([\w.:-]+)""", re.I)
+
+
+def _sniff_encoding(markup: bytes) -> str:
+    """
+    Encoding of an HTML/XHTML document from its BOM, <?xml encoding?> or
+    <meta charset>. libxml2's HTML parser ignores the XML declaration and
+    would read undeclared documents as Latin-1; EPUB XHTML defaults to UTF-8.
+    """
+    if markup.startswith(b"\xef\xbb\xbf"):
+        return "utf-8"
+    if markup.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    head = markup[:1024]
+    match = _XML_ENCODING.match(head) or _META_CHARSET.search(head)
+    return match.group(1).decode("ascii") if match else "utf-8"
+
+
+def _stream_text(markup: bytes, encoding: str) -> str:
+    try:
+        parser = etree.HTMLParser(target=_TextTarget(), recover=True, encoding=encoding)
+    except LookupError:  # an encoding libxml2 doesn't know
+        parser = etree.HTMLParser(target=_TextTarget(), recover=True, encoding="utf-8")
+    parser.feed(markup)
+    return parser.close()
+
+
+def html_to_text(markup: Union[str, bytes], parser: str = "stream") -> str:
+    """
+    Returns the plain text of an HTML/XHTML document.
+    parser is "stream" (needs lxml) or any make_soup() backend.
+    """
+    if parser == "stream" and etree is not None:
+        if isinstance(markup, str):
+            # Any charset declared inside the text no longer applies
+            markup, encoding = markup.encode("utf-8"), "utf-8"
+        else:
+            encoding = _sniff_encoding(markup)
+        if not markup.strip():
+            return ""
+        try:
+            return _stream_text(markup, encoding)
+        except etree.Error:
+            parser = DEFAULT_PARSER
+    if parser == "stream":
+        parser = DEFAULT_PARSER
+    return make_soup(markup, parser).get_text()
+
+
+def normalize_text(text: str) -> str:
+    """ Collapses whitespace, for comparing text extracted by different parsers """
+    return re.sub(r"\s+", " ", text).strip()
@@ -0,0 +1,152 @@
+"""
+http_client.py
+Shared HTTP client for every network module.
+
+- one pooled requests.Session per host, so connections (TCP + TLS) are kept alive
+- retries with exponential backoff on connection errors and 429/5xx answers
+  (retries=False makes a single attempt, for callers that fail over themselves)
+- token-bucket rate limiting per host, instead of fixed sleeps
+- per-request latency recording, see latency_summary()
+
+Usage:
+  import http_client
+  r = http_client.get("https://gutendex.com/books", params={"search": "verne"}, timeout=30)
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = 30
+POOL_SIZE = 16  # connections kept open per host
+
+# (requests per second, burst) per host; hosts not listed use DEFAULT_RATE
+DEFAULT_RATE: Tuple[float, int] = (10.0, 10)
+RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "gutendex.com": (2.0, 4),
+    "www.gutenberg.org": (2.0, 4),  # replaces the old 0.5 s sleep between books
+    "www.bbc.com": (8.0, 8),
+}
+
+LATENCY_SAMPLES = 200  # most recent requests remembered per host
+
+
+class TokenBucket:
+    """ Allows rate requests per second on average, with bursts of up to burst """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """ Blocks until a token is available, then takes it """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_lock = threading.Lock()
+_sessions: Dict[Tuple[str, bool], requests.Session] = {}
+_buckets: Dict[str, TokenBucket] = {}
+_latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+_errors: Dict[str, int] = defaultdict(int)
+
+
+def _new_session(retries: bool = True) -> requests.Session:
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,  # 0.5 s, 1 s, 2 s between attempts
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response back, raise_for_status() decides
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry if retries else 0)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def session_for(host: str, retries: bool = True) -> requests.Session:
+    """ The pooled session used for host, the one without retries if retries is False """
+    with _lock:
+        if (host, retries) not in _sessions:
+            _sessions[host, retries] = _new_session(retries)
+        return _sessions[host, retries]
+
+
+def set_rate_limit(host: str, rate: float, burst: int = 1):
+    """ Changes the request rate allowed for host """
+    with _lock:
+        RATE_LIMITS[host] = (rate, burst)
+        _buckets[host] = TokenBucket(rate, burst)
+
+
+def _bucket_for(host: str) -> TokenBucket:
+    with _lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(*RATE_LIMITS.get(host, DEFAULT_RATE))
+        return _buckets[host]
+
+
+def get(url: str, timeout: Optional[float] = DEFAULT_TIMEOUT, retries: bool = True, **kwargs) -> requests.Response:
+    """
+    requests.get() through the host's pooled session, after waiting for the
+    host's rate limit. Accepts the same keyword arguments as requests.get.
+    With retries=False connection errors and 429/5xx answers are not retried.
+    """
+    host = urlparse(url).netloc
+    _bucket_for(host).acquire()
+    start = time.perf_counter()
+    try:
+        response = session_for(host, retries).get(url, timeout=timeout, **kwargs)
+    except requests.RequestException:
+        with _lock:
+            _errors[host] += 1
+        raise
+    # with stream=True this is the time until the headers arrived
+    with _lock:
+        _latencies[host].append(time.perf_counter() - start)
+    return response
+
+
+def latency_stats() -> Dict[str, Dict[str, float]]:
+    """ {host: {"requests", "errors", "mean", "max"}} over the recent requests, in seconds """
+    with _lock:
+        hosts = set(_latencies) | set(_errors)
+        stats = {}
+        for host in hosts:
+            samples = list(_latencies.get(host, ()))
+            stats[host] = {
+                "requests": len(samples),
+                "errors": _errors.get(host, 0),
+                "mean": sum(samples) / len(samples) if samples else 0.0,
+                "max": max(samples) if samples else 0.0,
+            }
+        return stats
+
+
+def latency_summary() -> str:
+    lines = []
+    for host, s in sorted(latency_stats().items()):
+        lines.append(f"{host}: {s['requests']} requests, {s['errors']} errors, "
+                     f"mean {s['mean'] * 1000:.0f} ms, max {s['max'] * 1000:.0f} ms")
+    return "\n".join(lines)
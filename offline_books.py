@@ -15,17 +15,27 @@ Usage examples:
 
 from __future__ import annotations
 import argparse
+import functools
+import gzip
 import json
+import multiprocessing
 import os
 import random
-import time
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-import requests
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import ebooklib
 from ebooklib import epub
-from bs4 import BeautifulSoup
+
+import downloader
+import http_client
+from gutenberg_catalog import DEFAULT_CATALOG_PATH, Catalog, import_gutendex
+from html_parsing import html_to_text
+from search_index import SearchIndex
+
 GUTENDEX = "https://gutendex.com/books"
+DEFAULT_BOOKS_DIR = Path.home() / "gutenberg_books"
 
 # --- Helpers -----------------------------------------------------------------
 
@@ -67,31 +77,34 @@ def _safe_name(s: str) -> str:
     return "_".join(keep.split())[:120] or "book"
 
 def _get(url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    r = requests.get(url, params=params, timeout=30, headers={"User-Agent": "GutenHack/1.0 (+noncommercial demo)"})
+    r = http_client.get(url, params=params, timeout=30, headers={"User-Agent": "GutenHack/1.0 (+noncommercial demo)"})
     r.raise_for_status()
     return r.json()
 
 def _download_file(url: str, out_path: Path) -> None:
-    with requests.get(url, stream=True, timeout=60, headers={"User-Agent": "GutenHack/1.0"}) as r:
-        r.raise_for_status()
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(out_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 64):
-                if chunk:
-                    f.write(chunk)
+    # Resumable, a cut-off download continues from out_path + ".part" next time
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    downloader.download(url, str(out_path), headers={"User-Agent": "GutenHack/1.0"})
 
 # --- Search ------------------------------------------------------------------
 
-def search_gutenberg(
+MAX_SEARCH_PAGES = 10  # stop paging after this many Gutendex pages
+
+def _is_novel(book: Dict[str, Any]) -> bool:
+    return any("novel" in s.lower() for s in book.get("subjects", []))
+
+def iter_gutenberg(
     query: Optional[str],
     author: Optional[str],
     lang: str,
     limit: int,
     require_novel: bool,
-    randomize: bool,
-) -> List[Dict[str, Any]]:
+    max_pages: int = MAX_SEARCH_PAGES,
+) -> Iterator[Dict[str, Any]]:
     """
-    Queries Gutendex and returns up to `limit` book objects.
+    Queries Gutendex and yields up to `limit` book objects as they arrive.
+    The next page is prefetched while the current one is filtered, and paging
+    stops as soon as `limit` books were yielded (or after max_pages pages).
     We bias toward 'novel' subjects and English (configurable).
     """
     params = {
@@ -114,19 +127,65 @@ def search_gutenberg(
     if terms:
         params["search"] = " ".join(terms)
 
-    results: List[Dict[str, Any]] = []
-    url = GUTENDEX
-    while len(results) < limit and url:
-        payload = _get(url, {k: v for k, v in params.items() if v})
-        page_books = payload.get("results", [])
-        results.extend(page_books)
-        url = payload.get("next")
-
-    # Optional local subject filter to enforce “novel”
-    if require_novel:
-        results = [b for b in results if any("novel" in s.lower() for s in b.get("subjects", []))] or results
+    found = 0
+    unfiltered: List[Dict[str, Any]] = []  # fallback if nothing passes the novel filter
+    prefetcher = ThreadPoolExecutor(max_workers=1)
+    try:
+        payload = _get(GUTENDEX, {k: v for k, v in params.items() if v})
+        for page in range(max_pages):
+            url = payload.get("next")
+            # the "next" url already carries the query parameters
+            next_page = prefetcher.submit(_get, url) if url and page + 1 < max_pages else None
+
+            for b in payload.get("results", []):
+                # Optional local subject filter to enforce “novel”
+                if require_novel and not _is_novel(b):
+                    if len(unfiltered) < limit:
+                        unfiltered.append(b)
+                    continue
+                yield b
+                found += 1
+                if found >= limit:
+                    return
+
+            if next_page is None:
+                break
+            payload = next_page.result()
+
+        if found == 0:
+            yield from unfiltered
+    finally:
+        prefetcher.shutdown(wait=False, cancel_futures=True)
+
+def local_catalog() -> Optional[Catalog]:
+    """ The local catalog, or None until a full import of it has finished """
+    if not DEFAULT_CATALOG_PATH.exists():
+        return None
+    catalog = Catalog(DEFAULT_CATALOG_PATH)
+    return catalog if catalog.is_complete() else None
 
-    # Randomize if requested, else rely on Gutendex default (often popularity)
+def search_gutenberg(
+    query: Optional[str],
+    author: Optional[str],
+    lang: str,
+    limit: int,
+    require_novel: bool,
+    randomize: bool,
+    use_catalog: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Returns up to `limit` book objects. The local catalog (see
+    gutenberg_catalog.py) is searched once it has been fully imported,
+    otherwise Gutendex is queried live.
+    See iter_gutenberg() to start on the first results before paging is done.
+    """
+    # Randomize picks from a bigger pool, else rely on Gutendex default (often popularity)
+    pool = limit * 3 if randomize else limit
+    catalog = local_catalog() if use_catalog else None
+    if catalog is not None:
+        results = catalog.search(query, author, lang or "en", pool, require_novel)
+    else:
+        results = list(iter_gutenberg(query, author, lang, pool, require_novel))
     if randomize:
         random.shuffle(results)
 
@@ -134,51 +193,67 @@ def search_gutenberg(
 
 # --- Download ----------------------------------------------------------------
 
-def download_books(books: List[Dict[str, Any]], out_dir: Path, pause_sec: float = 0.5) -> List[Dict[str, Any]]:
+class _IndexWriter:
+    """
+    Writes each finished book's metadata.json and rewrites index.json after
+    every book, so a crash or Ctrl-C keeps all completed work. Books already
+    in index.json from earlier runs are kept (replaced if downloaded again).
+    Runs on a single worker thread, off the download path.
+    """
+
+    def __init__(self, index_path: Path):
+        self.index_path = index_path
+        self.metas: Dict[Any, Dict[str, Any]] = {}
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                for meta in json.load(f) or []:
+                    self.metas[meta.get("id")] = meta
+        except (OSError, ValueError):
+            pass
+
+    def add(self, book_dir: Path, meta: Dict[str, Any]) -> None:
+        with open(book_dir / "metadata.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self.metas[meta["id"]] = meta
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self.metas.values()), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+def _warn_on_error(future) -> None:
+    if future.exception() is not None:
+        print(f"[warn] could not write book metadata: {future.exception()}")
+
+def _fetch_optional(url: str, path: Path, what: str) -> Optional[Path]:
+    """ Downloads url to path, returning None (with a warning) on failure """
+    try:
+        _download_file(url, path)
+        return path
+    except Exception as e:
+        print(f"[warn] failed to download {what}: {e}")
+        return None
+
+def download_books(books: Iterable[Dict[str, Any]], out_dir: Path, max_workers: int = 4) -> List[Dict[str, Any]]:
     """
     For each book, pick a good format, download it (and cover), and write metadata.json.
-    Returns a list with local file info added.
+    Book and cover files download concurrently on up to max_workers threads;
+    politeness towards Gutenberg comes from http_client's per-host rate limit.
+    out_dir/index.json is updated as each book completes.
+    Returns a list with local file info added, in the order of books.
     """
     out_dir.mkdir(parents=True, exist_ok=True)
-    enriched: List[Dict[str, Any]] = []
+    index = _IndexWriter(out_dir / "index.json")
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
 
-    for b in books:
+    def finish(slot, b, book_dir, book_future, cover_future):
+        """ Called once a book's files are done; hands its metadata to the writer """
+        local_book = book_future.result() if book_future else None
+        local_cover = cover_future.result() if cover_future else None
         book_id = b.get("id")
-        title = b.get("title") or f"Gutenberg {book_id}"
-        author_names = ", ".join(a.get("name", "") for a in b.get("authors", [])) or "Unknown"
-        formats: Dict[str, str] = b.get("formats", {}) or {}
-        chosen = _pick_best_download(formats)
-        cover_url = _pick_cover(formats)
-
-        safe = _safe_name(f"{title} - {author_names}")
-        book_dir = out_dir / safe
-        book_dir.mkdir(parents=True, exist_ok=True)
-
-        local_book = None
-        if chosen:
-            mime, url = chosen
-            ext = ".epub" if "epub" in mime else ".txt" if "text/plain" in mime else ".bin"
-            local_book = book_dir / f"book{ext}"
-            try:
-                _download_file(url, local_book)
-            except Exception as e:
-                print(f"[warn] failed to download book {book_id}: {e}")
-                local_book = None
-        else:
-            print(f"[skip] no suitable format for {title}")
-
-        local_cover = None
-        if cover_url:
-            try:
-                ext = ".jpg" if cover_url.endswith(".jpg") else ".png"
-                local_cover = book_dir / f"cover{ext}"
-                _download_file(cover_url, local_cover)
-            except Exception:
-                local_cover = None
-
         meta = {
             "id": book_id,
-            "title": title,
+            "title": b.get("title") or f"Gutenberg {book_id}",
             "authors": [a.get("name") for a in b.get("authors", [])],
             "languages": b.get("languages"),
             "subjects": b.get("subjects"),
@@ -189,13 +264,53 @@ def download_books(books: List[Dict[str, Any]], out_dir: Path, pause_sec: float
             "license": "Public Domain (check your jurisdiction)",
             "word_count_hint": b.get("download_count"),  # Gutendex does not expose word counts; keeping downloads metric
         }
-        with open(book_dir / "metadata.json", "w", encoding="utf-8") as f:
-            json.dump(meta, f, ensure_ascii=False, indent=2)
-
-        enriched.append(meta)
-        time.sleep(pause_sec)  # be polite
-
-    return enriched
+        results[slot] = meta
+        writer.submit(index.add, book_dir, meta).add_done_callback(_warn_on_error)
+
+    # the download pool exits (and finishes its callbacks) before the writer
+    with ThreadPoolExecutor(max_workers=1) as writer, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for b in books:
+            book_id = b.get("id")
+            title = b.get("title") or f"Gutenberg {book_id}"
+            author_names = ", ".join(a.get("name", "") for a in b.get("authors", [])) or "Unknown"
+            formats: Dict[str, str] = b.get("formats", {}) or {}
+            chosen = _pick_best_download(formats)
+            cover_url = _pick_cover(formats)
+
+            safe = _safe_name(f"{title} - {author_names}")
+            book_dir = out_dir / safe
+            book_dir.mkdir(parents=True, exist_ok=True)
+
+            book_future = None
+            if chosen:
+                mime, url = chosen
+                ext = ".epub" if "epub" in mime else ".txt" if "text/plain" in mime else ".bin"
+                book_future = pool.submit(_fetch_optional, url, book_dir / f"book{ext}", f"book {book_id}")
+            else:
+                print(f"[skip] no suitable format for {title}")
+
+            cover_future = None
+            if cover_url:
+                ext = ".jpg" if cover_url.endswith(".jpg") else ".png"
+                cover_future = pool.submit(_fetch_optional, cover_url, book_dir / f"cover{ext}", f"cover of {book_id}")
+
+            results.append({})
+            files = [f for f in (book_future, cover_future) if f]
+            done = functools.partial(finish, len(results) - 1, b, book_dir, book_future, cover_future)
+            if not files:
+                done()
+                continue
+            remaining = [len(files)]
+            def on_file_done(_future, done=done, remaining=remaining):
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    done()
+            for f in files:
+                f.add_done_callback(on_file_done)
+
+    return results
 
 # --- CLI ---------------------------------------------------------------------
 
@@ -205,11 +320,20 @@ def main():
     ap.add_argument("--author", type=str, default=None, help="author filter (e.g., 'jules verne')")
     ap.add_argument("--lang", type=str, default="en", help="language code (default: en)")
     ap.add_argument("--limit", type=int, default=5, help="number of books to fetch")
-    ap.add_argument("--out", type=Path, default=Path.home() / "gutenberg_books", help="output directory")
+    ap.add_argument("--out", type=Path, default=DEFAULT_BOOKS_DIR, help="output directory")
     ap.add_argument("--random", action="store_true", help="shuffle results (nice for variety)")
     ap.add_argument("--strict-novel", action="store_true", help="enforce 'novel' subject")
+    ap.add_argument("--refresh-catalog", action="store_true", help="add new Gutendex books to the local catalog (or resume its import) first")
+    ap.add_argument("--live", action="store_true", help="search Gutendex online even if a local catalog exists")
+    ap.add_argument("--workers", type=int, default=4, help="book/cover downloads to run at once")
+    ap.add_argument("--search-local", type=str, default=None, help="search the text of downloaded books and exit")
     args = ap.parse_args()
 
+    if args.search_local:
+        for hit in search_downloaded_books(args.search_local):
+            print(f"{hit['title']} ({hit['score']:.2f})\n    {hit['snippet']}")
+        return
+
     # ensure output dir is writable (try to create and write a temp file)
     out_dir = args.out
     try:
@@ -221,26 +345,172 @@ def main():
     except Exception as e:
         ap.error(f"output directory {out_dir!s} is not writable: {e}")
 
-    books = search_gutenberg(
-         query=args.query,
-         author=args.author,
-         lang=args.lang,
-         limit=args.limit,
-         require_novel=args.strict_novel,
-         randomize=args.random,
-     )
-    print(f"Found {len(books)} books; downloading to {args.out}…")
-    metas = download_books(books, args.out)
-
-    index_path = args.out / "index.json"
-    with open(index_path, "w", encoding="utf-8") as f:
-        json.dump(metas, f, ensure_ascii=False, indent=2)
-    print(f"Done. Wrote {index_path}")
+    if args.refresh_catalog:
+        print(f"Added {import_gutendex(Catalog(DEFAULT_CATALOG_PATH))} new books to the local catalog")
+
+    catalog = local_catalog() if not args.live else None
+    if args.random or catalog is not None:
+        # the local catalog answers in milliseconds, no need to stream
+        books = search_gutenberg(
+             query=args.query,
+             author=args.author,
+             lang=args.lang,
+             limit=args.limit,
+             require_novel=args.strict_novel,
+             randomize=args.random,
+             use_catalog=not args.live,
+         )
+    else:
+        # downloads start on the first results while later pages are still loading
+        books = iter_gutenberg(
+            query=args.query,
+            author=args.author,
+            lang=args.lang,
+            limit=args.limit,
+            require_novel=args.strict_novel,
+        )
+    print(f"Searching for books; downloading to {args.out}…")
+    metas = download_books(books, args.out, max_workers=args.workers)
+    print(f"Downloaded {len(metas)} books")
+
+    print(f"Done. Updated {args.out / 'index.json'}")
+    print(f"Indexed {index_downloaded_books(args.out)} new or changed books for search")
+    print(http_client.latency_summary())
     for i in metas:
        epub_file = i.get("downloaded_file")
        text = get_epub_text(epub_file)
        print(text[:10000])
 
+# --- Extracted text cache ----------------------------------------------------
+# EPUB text is cached next to the book as book.txt.gz plus a book.text.json
+# manifest holding the source file's mtime/size and the chapter offsets, so a
+# warm start never has to parse HTML.
+
+def _flatten_toc(toc, out: Dict[str, str]) -> Dict[str, str]:
+    """ Maps each href (without #fragment) in an ebooklib toc to its title """
+    for entry in toc:
+        if isinstance(entry, tuple):
+            section, children = entry
+            _flatten_toc([section], out)
+            _flatten_toc(children, out)
+            continue
+        href = getattr(entry, "href", None)
+        if href:
+            out.setdefault(href.split("#", 1)[0], getattr(entry, "title", "") or "")
+    return out
+
+def _epub_documents(book) -> List[Tuple[str, Any]]:
+    """ (chapter title, document item) pairs of an epub, in reading order """
+    titles = _flatten_toc(book.toc, {})
+    items = [book.get_item_with_id(idref) for idref, _linear in book.spine]
+    items = [it for it in items if it is not None and it.get_type() == ebooklib.ITEM_DOCUMENT]
+    if not items:
+        items = list(book.get_items_of_type(ebooklib.ITEM_DOCUMENT))
+    return [(titles.get(item.get_name()) or f"Section {n + 1}", item) for n, item in enumerate(items)]
+
+def _text_cache_paths(p: Path) -> Tuple[Path, Path]:
+    return p.with_name(p.stem + ".txt.gz"), p.with_name(p.stem + ".text.json")
+
+def _read_manifest(p: Path) -> Optional[Dict[str, Any]]:
+    """ The cache manifest of p, or None if there is none or the book file changed since """
+    _, manifest_path = _text_cache_paths(p)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        st = p.stat()
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    if manifest.get("mtime_ns") != st.st_mtime_ns or manifest.get("size") != st.st_size:
+        return None
+    return manifest
+
+def _has_text_cache(p: Path) -> bool:
+    """ True if p has a current text cache, checked without decompressing the text """
+    return _read_manifest(p) is not None and _text_cache_paths(p)[0].exists()
+
+def _read_text_cache(p: Path) -> Optional[Tuple[str, List[Tuple[str, int, int]]]]:
+    """
+    Returns (text, [(chapter title, start, end), ...]) from the cache,
+    or None if there is no cache or the book file changed since it was written.
+    """
+    manifest = _read_manifest(p)
+    if manifest is None:
+        return None
+    text_path, _ = _text_cache_paths(p)
+    try:
+        with gzip.open(text_path, "rt", encoding="utf-8") as f:
+            text = f.read()
+        return text, [tuple(c) for c in manifest["chapters"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _write_text_cache(p: Path, st: os.stat_result, chapters: List[Tuple[str, str]]) -> None:
+    """ Writes the cache for p; st is the stat of the book taken before extracting """
+    text_path, manifest_path = _text_cache_paths(p)
+    spans, pos = [], 0
+    for title, text in chapters:
+        spans.append((title, pos, pos + len(text)))
+        pos += len(text) + 1  # chapters are joined with "\n"
+    manifest = {"source": p.name, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "chapters": spans}
+    try:
+        # write to temp files first so a crash never leaves a half written cache
+        with gzip.open(str(text_path) + ".tmp", "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write("\n".join(text for _, text in chapters))
+        os.replace(str(text_path) + ".tmp", text_path)
+        with open(str(manifest_path) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(str(manifest_path) + ".tmp", manifest_path)
+    except OSError as e:
+        print(f"[warn] could not write text cache for {p}: {e}")
+
+def _extract_chapter_range(epub_path: str, start: int, stop: Optional[int]) -> List[Tuple[str, str]]:
+    """
+    Parses the documents [start:stop] of an epub into (title, text) pairs.
+    Module level so it can run in a worker process.
+    """
+    return _documents_text(_epub_documents(epub.read_epub(epub_path))[start:stop])
+
+def _documents_text(documents: List[Tuple[str, Any]]) -> List[Tuple[str, str]]:
+    chapters = []
+    for title, item in documents:
+        try:
+            chapters.append((title, html_to_text(item.get_content())))
+        except Exception:
+            continue
+    return chapters
+
+def _extract_book_start(epub_path: str, split: bool) -> Tuple[int, List[Tuple[str, str]]]:
+    """
+    First task of every book: parses the epub once and returns its document
+    count with the text of the first CHAPTERS_PER_TASK documents (all of
+    them unless split), so the parent can hand the rest out as ranges.
+    Module level so it can run in a worker process.
+    """
+    documents = _epub_documents(epub.read_epub(epub_path))
+    return len(documents), _documents_text(documents[:CHAPTERS_PER_TASK] if split else documents)
+
+def get_epub_chapters(epub_path) -> List[Tuple[str, str]]:
+    """
+    Returns [(chapter title, chapter text), ...] of an epub, using the
+    text cache when it is still valid and filling it otherwise.
+    """
+    p = Path(epub_path)
+    cached = _read_text_cache(p)
+    if cached is not None:
+        text, spans = cached
+        return [(title, text[start:end]) for title, start, end in spans]
+
+    try:
+        st = p.stat()
+        chapters = _extract_chapter_range(str(p), 0, None)
+    except Exception:
+        return []
+    if chapters:
+        _write_text_cache(p, st, chapters)
+    return chapters
+
 def get_epub_text(epub_path):
     if not epub_path:
         return ""
@@ -254,19 +524,252 @@ def get_epub_text(epub_path):
         except Exception:
             return ""
     # epub files
+    cached = _read_text_cache(p)
+    if cached is not None:
+        return cached[0]
+    return "\n".join(text for _, text in get_epub_chapters(p))
+
+# --- Parallel extraction -----------------------------------------------------
+
+LARGE_BOOK_BYTES = 2 * 1024 * 1024  # epubs bigger than this are split across workers
+CHAPTERS_PER_TASK = 8
+
+def iter_extracted_books(paths: Iterable[str], workers: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Extracts the text of many books on a process pool and yields
+    (path, text) as each book finishes, in completion order.
+    Plain text and already cached books are yielded straight away. Paths are
+    submitted a few at a time while finished books are yielded, so the first
+    book arrives without waiting on the rest of the library. A large epub's
+    first task also reports its chapter count; the remaining chapters are
+    then split into ranges so one big book can use several cores.
+    The text cache is written for every extracted epub. If any task of a book
+    fails (a parse error, a crashed worker) the book is yielded with no text
+    and not cached, so a partial extraction is never served as the book.
+    """
+    pending: Dict[str, Tuple[Path, os.stat_result, List[Any]]] = {}
+    failed: Set[str] = set()
+    futures: Dict[Any, Tuple[str, int]] = {}
+    executor = None
+    max_in_flight = 2 * (workers or os.cpu_count() or 1)
+    remaining = iter(paths)
+    exhausted = False
     try:
-        book = epub.read_epub(str(p))
-    except Exception:
-        return ""
-    text_content = []
-    for item in book.get_items():
+        while not exhausted or futures:
+            # Keep the pool busy without walking the whole library up front
+            while not exhausted and len(futures) < max_in_flight:
+                path = next(remaining, None)
+                if path is None:
+                    exhausted = True
+                    break
+                p = Path(path)
+                if path in pending or not p.exists():
+                    continue
+                if p.suffix.lower() == ".txt":
+                    yield path, get_epub_text(p)
+                    continue
+                cached = _read_text_cache(p)
+                if cached is not None:
+                    yield path, cached[0]
+                    continue
+
+                if executor is None:
+                    # spawn, since forking a process that runs Tk and threads is unsafe
+                    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                st = p.stat()
+                split = st.st_size > LARGE_BOOK_BYTES
+                pending[path] = (p, st, [None])
+                futures[executor.submit(_extract_book_start, str(p), split)] = (path, 0)
+
+            if not futures:
+                continue
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, part = futures.pop(future)
+                p, st, parts = pending[path]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[warn] could not extract part {part} of {p}: {e}")
+                    failed.add(path)
+                    result = (0, []) if part == 0 else []
+                if part == 0:
+                    count, parts[0] = result
+                    if st.st_size > LARGE_BOOK_BYTES:
+                        for start in range(CHAPTERS_PER_TASK, count, CHAPTERS_PER_TASK):
+                            parts.append(None)
+                            task = executor.submit(_extract_chapter_range, str(p), start, start + CHAPTERS_PER_TASK)
+                            futures[task] = (path, len(parts) - 1)
+                else:
+                    parts[part] = result
+                if any(chunk is None for chunk in parts):
+                    continue # still waiting on other chapters of this book
+                del pending[path]
+                if path in failed:
+                    failed.discard(path)
+                    yield path, ""
+                    continue
+                chapters = [c for chunk in parts for c in chunk]
+                if chapters:
+                    _write_text_cache(p, st, chapters)
+                yield path, "\n".join(text for _, text in chapters)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Full-text search ---------------------------------------------------------
+
+def index_downloaded_books(out_dir: Path = DEFAULT_BOOKS_DIR, index: Optional[SearchIndex] = None) -> int:
+    """
+    Adds the books listed in out_dir/index.json to the full-text search index.
+    Books whose file mtime/size did not change since they were indexed are
+    skipped without extracting their text. Returns how many were (re)indexed.
+    """
+    index_path = out_dir / "index.json"
+    if not index_path.exists():
+        return 0
+    with open(index_path, "r", encoding="utf-8") as f:
+        metas = json.load(f)
+
+    index = index if index is not None else SearchIndex()
+    stale: Dict[str, Tuple[str, str, str]] = {}  # path -> (doc_id, title, signature)
+    for meta in metas:
+        book_file = meta.get("downloaded_file")
+        if not book_file or not Path(book_file).exists():
+            continue
+        st = Path(book_file).stat()
+        doc_id = f"gutenberg:{meta.get('id')}"
+        signature = f"{st.st_mtime_ns}:{st.st_size}"
+        if not index.is_current(doc_id, signature):
+            stale[book_file] = (doc_id, meta.get("title") or "", signature)
+
+    updated = 0
+    for book_file, text in iter_extracted_books(stale):
+        doc_id, title, signature = stale[book_file]
+        if text and index.update(doc_id, "book", title, text, signature):
+            updated += 1
+    return updated
+
+def search_downloaded_books(query: str, limit: int = 20, index: Optional[SearchIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Ranked search over the text of downloaded books.
+    Returns hits as dicts with doc_id, title, score and snippet.
+    """
+    index = index if index is not None else SearchIndex()
+    return index.search(query, kind="book", limit=limit)
+
+# --- Lazy book library -------------------------------------------------------
+
+TXT_PAGE_CHARS = 40_000  # plain text books are split into pages of about this size
+
+def _split_pages(text: str, size: int = TXT_PAGE_CHARS) -> List[str]:
+    """ Splits text into pages of roughly size chars, breaking at paragraphs """
+    pages, start = [], 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            brk = text.rfind("\n\n", start, end)
+            if brk > start:
+                end = brk
+        pages.append(text[start:end])
+        start = end
+    return pages or [""]
+
+class BookLibrary:
+    """
+    Lazy view over the downloaded books in index.json.
+    Only metadata is read up front; a book is opened when its table of
+    contents is asked for, and a chapter is parsed only when it is shown
+    (or read from the text cache if one was already written).
+    Only the most recently used book is kept open.
+    """
+
+    def __init__(self, out_dir: Path = DEFAULT_BOOKS_DIR):
+        self.out_dir = out_dir
+        self.index_path = out_dir / "index.json"
+        self.metas: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._open_idx: Optional[int] = None
+        self._open_chapters: List[Tuple[str, Any]] = []  # (title, epub item or page text)
+
+    def load(self) -> None:
+        """ Reads index.json. Raises FileNotFoundError if nothing was downloaded yet. """
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            self.metas = json.load(f) or []
+
+    def _open(self, book_idx: int) -> List[Tuple[str, Any]]:
+        if self._open_idx == book_idx:
+            return self._open_chapters
+
+        chapters: List[Tuple[str, Any]] = []
+        book_file = self.metas[book_idx].get("downloaded_file")
+        p = Path(book_file) if book_file else None
+        if p is not None and p.exists():
+            if p.suffix.lower() == ".txt":
+                text = get_epub_text(str(p))
+                chapters = [(f"Page {i + 1}", page) for i, page in enumerate(_split_pages(text))]
+            else:
+                cached = _read_text_cache(p)
+                if cached is not None:
+                    # warm start, chapters come straight from the text cache
+                    text, spans = cached
+                    chapters = [(title, text[start:end]) for title, start, end in spans]
+                else:
+                    try:
+                        chapters = _epub_documents(epub.read_epub(str(p)))
+                    except Exception:
+                        chapters = []
+
+        self._open_idx, self._open_chapters = book_idx, chapters
+        return chapters
+
+    def table_of_contents(self, book_idx: int) -> List[str]:
+        """ Chapter titles of a book, in reading order """
+        with self._lock:
+            return [title for title, _ in self._open(book_idx)]
+
+    def chapter_text(self, book_idx: int, chapter_idx: int) -> str:
+        """ Plain text of one chapter, parsed on demand """
+        with self._lock:
+            chapters = self._open(book_idx)
+            if not 0 <= chapter_idx < len(chapters):
+                return ""
+            content = chapters[chapter_idx][1]
+        if isinstance(content, str):
+            return content
         try:
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                soup = BeautifulSoup(item.get_content(), "html.parser")
-                text_content.append(soup.get_text())
+            return html_to_text(content.get_content())
         except Exception:
-            continue
-    return "\n".join(text_content)
+            return ""
+
+    def prepare_books(self, workers: Optional[int] = None) -> Iterator[int]:
+        """
+        Extracts every book into the text cache on a process pool, yielding
+        each book's index as soon as it is ready to open instantly.
+        Plain text books and books whose cache is current are yielded first,
+        from a stat() and the manifest alone, without reading their text.
+        """
+        by_path: Dict[str, List[int]] = {}
+        for i, meta in enumerate(self.metas):
+            if meta.get("downloaded_file"):
+                by_path.setdefault(meta["downloaded_file"], []).append(i)
+        stale = []
+        for path, book_idxs in by_path.items():
+            p = Path(path)
+            if (p.suffix.lower() == ".txt" and p.exists()) or _has_text_cache(p):
+                yield from book_idxs
+            else:
+                stale.append(path)
+        for path, _text in iter_extracted_books(stale, workers):
+            yield from by_path[path]
+
+    @staticmethod
+    def label(meta: Dict[str, Any]) -> str:
+        """ "Title by Author" line for a book's metadata """
+        authors = meta.get("authors")
+        if not isinstance(authors, list) or not authors:
+            authors = ["Unknown Author"]
+        return f"{meta.get('title', 'Unknown Title')} by {', '.join(a or '' for a in authors)}"
 
 # --- NEW FUNCTION FOR UI ---
 
@@ -277,8 +780,7 @@ def get_all_downloaded_books_text() -> str:
     their combined text.
     """
     # This path is based on the default in your main() function
-    default_dir = Path.home() / "gutenberg_books"
-    index_path = default_dir / "index.json"
+    index_path = DEFAULT_BOOKS_DIR / "index.json"
 
     if not index_path.exists():
         return (f"Error: index.json not found.\n\n"
@@ -294,6 +796,10 @@ def get_all_downloaded_books_text() -> str:
     if not metas:
         return "No books found in index.json. Please run the download script."
 
+    # Extract every book across all cores first, then assemble them in order
+    files = [meta.get("downloaded_file") for meta in metas if meta.get("downloaded_file")]
+    texts = dict(iter_extracted_books(files))
+
     all_books_text = []
     for i, meta in enumerate(metas):
         title = meta.get("title", "Unknown Title")
@@ -311,7 +817,7 @@ def get_all_downloaded_books_text() -> str:
         if not epub_file:
             text = "[Book file not found in metadata]\n\n"
         else:
-            text = get_epub_text(epub_file)
+            text = texts.get(epub_file)
             if not text:
                 text = f"[Could not read or parse book file: {epub_file}]\n\n"
         
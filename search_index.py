@@ -0,0 +1,138 @@
+"""
+search_index.py
+Local full-text index over downloaded articles and books (SQLite FTS5).
+
+Every document has a doc_id, a kind ("article" or "book"), a title and its
+text. Documents also carry a signature (text hash, file mtime/size, ...) so
+re-indexing only touches documents that changed.
+
+Usage:
+  python search_index.py "kyoto temples" --kind article
+"""
+
+from __future__ import annotations
+import argparse
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import sqlite_db
+
+DEFAULT_INDEX_PATH = Path.home() / ".scravel" / "search_index.db"
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS docs (
+        id        INTEGER PRIMARY KEY,
+        doc_id    TEXT UNIQUE NOT NULL,
+        kind      TEXT NOT NULL,
+        title     TEXT NOT NULL DEFAULT '',
+        signature TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS docs_kind ON docs (kind)",
+    # rowid of each postings row is docs.id
+    "CREATE VIRTUAL TABLE IF NOT EXISTS postings USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')",
+]
+
+
+def _match_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 query: every word must appear, and words
+    match as prefixes so "temple" also finds "temples".
+    """
+    words = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class SearchIndex:
+    """ Inverted index with ranked (BM25) multi-term search """
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        sqlite_db.create(self.path, _SCHEMA)
+
+    def __len__(self) -> int:
+        return sqlite_db.count(self.path, "docs")
+
+    def is_current(self, doc_id: str, signature: str) -> bool:
+        """ True if doc_id is indexed with this exact signature """
+        with sqlite_db.connect(self.path) as db:
+            row = db.execute("SELECT signature FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row is not None and row[0] == signature
+
+    def update(self, doc_id: str, kind: str, title: str, text: str, signature: Optional[str] = None) -> bool:
+        """
+        Adds or replaces a document. Returns False (and does nothing) when the
+        document is already indexed with the same signature.
+        """
+        with sqlite_db.connect(self.path) as db:
+            row = db.execute("SELECT id, signature FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is not None and signature is not None and row[1] == signature:
+                return False
+            if row is None:
+                rowid = db.execute(
+                    "INSERT INTO docs (doc_id, kind, title, signature) VALUES (?, ?, ?, ?)",
+                    (doc_id, kind, title or "", signature),
+                ).lastrowid
+            else:
+                rowid = row[0]
+                db.execute(
+                    "UPDATE docs SET kind = ?, title = ?, signature = ? WHERE id = ?",
+                    (kind, title or "", signature, rowid),
+                )
+                db.execute("DELETE FROM postings WHERE rowid = ?", (rowid,))
+            db.execute("INSERT INTO postings (rowid, title, body) VALUES (?, ?, ?)", (rowid, title or "", text))
+        return True
+
+    def remove(self, doc_id: str) -> None:
+        with sqlite_db.connect(self.path) as db:
+            row = db.execute("SELECT id FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is not None:
+                db.execute("DELETE FROM postings WHERE rowid = ?", (row[0],))
+                db.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Returns up to limit hits, best first, as dicts with doc_id, kind,
+        title, score (lower is better) and a short snippet of matching text.
+        """
+        match = _match_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT d.doc_id, d.kind, d.title, bm25(postings, 5.0, 1.0) AS score, "
+            "snippet(postings, 1, '', '', '...', 24) "
+            "FROM postings JOIN docs d ON d.id = postings.rowid "
+            "WHERE postings MATCH ?"
+        )
+        params: List[Any] = [match]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        with sqlite_db.connect(self.path) as db:
+            rows = db.execute(sql, params).fetchall()
+        keys = ("doc_id", "kind", "title", "score", "snippet")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+# --- CLI ---------------------------------------------------------------------
+
+def main():
+    ap = argparse.ArgumentParser(description="Search downloaded articles and books")
+    ap.add_argument("query", type=str, help="words to search for")
+    ap.add_argument("--kind", choices=["article", "book"], default=None, help="only search one kind of document")
+    ap.add_argument("--limit", type=int, default=10, help="number of hits to show")
+    ap.add_argument("--index", type=Path, default=DEFAULT_INDEX_PATH, help="path of the index database")
+    args = ap.parse_args()
+
+    index = SearchIndex(args.index)
+    for hit in index.search(args.query, kind=args.kind, limit=args.limit):
+        print(f"[{hit['kind']}] {hit['title'] or hit['doc_id']} ({hit['score']:.2f})")
+        print(f"    {hit['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+shorts_library.py
+Index of the downloaded YouTube shorts, keyed by videoId.
+
+Each short is stored as "<videoId>.mp4" in the shorts folder, and a SQLite
+index next to it (library.db) keeps its title, duration, size, resolution and
+the paths of its cached WAV and thumbnail. Downloads skip ids that are
+already in the library, and the player reads its playlist from the index
+instead of listing the folder.
+
+Usage:
+  # List the shorts in ./videos
+  python shorts_library.py --dir videos/
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import sqlite_db
+
+LIBRARY_NAME = "library.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shorts (
+    id             TEXT PRIMARY KEY,  -- YouTube videoId
+    title          TEXT NOT NULL DEFAULT '',
+    duration       INTEGER NOT NULL DEFAULT 0,  -- seconds
+    size           INTEGER NOT NULL DEFAULT 0,  -- bytes
+    resolution     TEXT NOT NULL DEFAULT '',    -- "720x1280"
+    video_path     TEXT NOT NULL,
+    audio_path     TEXT,
+    thumbnail_path TEXT,
+    added_at       REAL NOT NULL
+)
+"""
+
+_COLUMNS = ("id", "title", "duration", "size", "resolution", "video_path", "audio_path", "thumbnail_path", "added_at")
+
+
+def video_path_for(video_dir: str, video_id: str) -> str:
+    return os.path.join(video_dir, video_id + ".mp4")
+
+
+def video_id_for(video_path: str) -> str:
+    """ The videoId a library file is named after """
+    return os.path.splitext(os.path.basename(video_path))[0]
+
+
+class ShortsLibrary:
+    """ SQLite index of the shorts in video_dir """
+
+    def __init__(self, video_dir: str):
+        self.video_dir = video_dir
+        self.path = os.path.join(video_dir, LIBRARY_NAME)
+        sqlite_db.create(self.path, [_SCHEMA])
+
+    def __len__(self) -> int:
+        return sqlite_db.count(self.path, "shorts")
+
+    def __contains__(self, video_id: str) -> bool:
+        """ True if the short is indexed and its file is still there """
+        short = self.get(video_id)
+        return short is not None and os.path.exists(short["video_path"])
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        with sqlite_db.connect(self.path) as db:
+            row = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM shorts WHERE id = ?", (video_id,)).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def put(self, short: Dict[str, Any]) -> None:
+        """ Insert or replace a short dict (see _COLUMNS for the keys) """
+        record = {k: short.get(k) for k in _COLUMNS}
+        record["title"] = record["title"] or ""
+        record["duration"] = record["duration"] or 0
+        record["size"] = record["size"] or 0
+        record["resolution"] = record["resolution"] or ""
+        if record["added_at"] is None:
+            record["added_at"] = time.time()
+        with sqlite_db.connect(self.path) as db:
+            sqlite_db.insert_or_replace(db, "shorts", _COLUMNS, record)
+
+    def set_audio(self, video_id: str, audio_path: str) -> None:
+        with sqlite_db.connect(self.path) as db:
+            db.execute("UPDATE shorts SET audio_path = ? WHERE id = ?", (audio_path, video_id))
+
+    def set_thumbnail(self, video_id: str, thumbnail_path: str) -> None:
+        with sqlite_db.connect(self.path) as db:
+            db.execute("UPDATE shorts SET thumbnail_path = ? WHERE id = ?", (thumbnail_path, video_id))
+
+    def import_untracked(self) -> int:
+        """
+        Adds .mp4 files in video_dir that are not indexed yet, such as shorts
+        saved as "<title>.mp4" before the library existed. The file name stem
+        becomes both the id and the title. Returns how many were added.
+        """
+        indexed = {os.path.normpath(s["video_path"]) for s in self.all()}
+        added = 0
+        for file in sorted(os.listdir(self.video_dir)):
+            path = os.path.join(self.video_dir, file)
+            if not file.endswith(".mp4") or os.path.normpath(path) in indexed:
+                continue # e.g. unfinished .part downloads
+            stem = video_id_for(path)
+            if self.get(stem) is not None:
+                continue
+            self.put({"id": stem, "title": stem, "size": os.path.getsize(path), "video_path": path,
+                      "added_at": os.path.getmtime(path)})
+            added += 1
+        return added
+
+    def all(self) -> List[Dict[str, Any]]:
+        """ Every short whose file still exists, oldest download first """
+        with sqlite_db.connect(self.path) as db:
+            rows = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM shorts ORDER BY added_at").fetchall()
+        shorts = [dict(zip(_COLUMNS, row)) for row in rows]
+        return [s for s in shorts if os.path.exists(s["video_path"])]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Index of the downloaded shorts")
+    ap.add_argument("--dir", type=str, default="videos/", help="folder the shorts are downloaded to")
+    args = ap.parse_args()
+
+    library = ShortsLibrary(args.dir)
+    shorts = library.all()
+    for s in shorts:
+        print(f"  [{s['id']}] {s['title']} ({s['duration']} s, {s['resolution']}, {s['size'] / 1e6:.1f} MB)")
+    print(f"{len(shorts)} shorts in {library.path}")
+
+
+if __name__ == "__main__":
+    main()
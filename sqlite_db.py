@@ -0,0 +1,48 @@
+"""
+sqlite_db.py
+Helpers shared by the SQLite backed stores: the article store, the search
+index, the Gutenberg catalog, the shorts library and the thumbnail cache.
+
+Every call opens its own short-lived connection, so the stores can be used
+from worker threads without sharing a connection between them.
+"""
+
+from __future__ import annotations
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Sequence, Union
+
+PathLike = Union[str, Path]
+
+
+@contextmanager
+def connect(path: PathLike) -> Iterator[sqlite3.Connection]:
+    """ Opens path, commits when the block succeeds (rolls back if it raises) and closes """
+    db = sqlite3.connect(str(path), timeout=30)
+    try:
+        with db:
+            yield db
+    finally:
+        db.close()
+
+
+def create(path: PathLike, schema: Iterable[str]) -> None:
+    """ Creates the database file, its folder and every table in schema """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with connect(path) as db:
+        for stmt in schema:
+            db.execute(stmt)
+
+
+def count(path: PathLike, table: str) -> int:
+    with connect(path) as db:
+        return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def insert_or_replace(db: sqlite3.Connection, table: str, columns: Sequence[str], record: Dict[str, Any]) -> None:
+    """ Writes record (a dict holding every key in columns) as one row of table """
+    db.execute(
+        f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        tuple(record[k] for k in columns),
+    )
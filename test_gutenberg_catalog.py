@@ -0,0 +1,59 @@
+"""
+test_gutenberg_catalog.py
+Checks gutenberg_catalog.Catalog.search on a small catalog in a temporary
+folder, including queries that have no words to match.
+
+Usage:
+  python -m unittest test_gutenberg_catalog
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import gutenberg_catalog
+
+
+def _book(book_id, title, author, downloads, subjects=("Adventure stories",)):
+    return {
+        "id": book_id,
+        "title": title,
+        "authors": [{"name": author}],
+        "languages": ["en"],
+        "subjects": list(subjects),
+        "formats": {},
+        "download_count": downloads,
+    }
+
+
+class CatalogSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.catalog = gutenberg_catalog.Catalog(Path(self.tmp.name) / "catalog.db")
+        self.catalog.upsert([
+            _book(164, "Twenty Thousand Leagues under the Sea", "Verne, Jules", 300),
+            _book(103, "Around the World in Eighty Days", "Verne, Jules", 500),
+            _book(1342, "Pride and Prejudice", "Austen, Jane", 900, subjects=("Love stories",)),
+        ])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ids(self, **kwargs):
+        return [b["id"] for b in self.catalog.search(limit=10, **kwargs)]
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.ids(query="leag sea"), [164])
+
+    def test_author_filter(self):
+        self.assertEqual(self.ids(query="the", author="jules verne"), [103, 164])
+
+    def test_query_without_words_is_ignored(self):
+        # Every book, most downloaded first, instead of an fts5 syntax error
+        self.assertEqual(self.ids(query="!!"), [1342, 103, 164])
+        self.assertEqual(self.ids(query="--", author="verne"), [103, 164])
+        self.assertEqual(self.ids(query="!!", author="--"), [1342, 103, 164])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+test_instance_pool.py
+Checks youtube.InstancePool against stub Invidious instances served by
+http.server on localhost: a fast one, a slow one, one answering 500, one
+that refuses connections, one that stalls past the timeout, and the 404 a
+removed video gets.
+
+Usage:
+  python -m unittest test_instance_pool
+"""
+
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import http_client
+import youtube
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """ Answers like an Invidious instance; the server's status and delay decide how well """
+
+    def do_GET(self):
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        status = self.server.status
+        if self.path.startswith("/api/v1/videos/removed"):
+            status = 404
+        body = json.dumps([{"videoId": "abc"}] if status == 200 else {"error": "stub"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub(status=200, delay=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.status, server.delay, server.hits = status, delay, 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_client.set_rate_limit(f"127.0.0.1:{server.server_port}", 100.0, 100)
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _closed_port_url():
+    """ A localhost url nothing listens on """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+class InstancePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def stub(self, status=200, delay=0.0):
+        server, url = _start_stub(status, delay)
+        self.servers.append(server)
+        return server, url
+
+    def test_health_check_ranks_by_latency_and_errors(self):
+        _, slow = self.stub(delay=0.2)
+        _, fast = self.stub()
+        _, broken = self.stub(status=500)
+        down = _closed_port_url()
+        pool = youtube.InstancePool([broken, down, slow, fast], timeout=2)
+        pool.check_health()
+        ranked = pool.ranked()
+        self.assertEqual(ranked[:2], [fast, slow])
+        self.assertEqual(set(ranked[2:]), {broken, down})
+
+    def test_fails_over_to_next_instance(self):
+        broken_server, broken = self.stub(status=500)
+        _, good = self.stub()
+        pool = youtube.InstancePool([broken, _closed_port_url(), good], timeout=2)
+        response = pool.get("/api/v1/search/")
+        self.assertEqual(response.json(), [{"videoId": "abc"}])
+        self.assertTrue(response.url.startswith(good))
+        self.assertGreater(broken_server.hits, 0)
+        # The failed instances now wait out their cooldown at the back
+        self.assertEqual(pool.ranked()[0], good)
+
+    def test_failing_instance_gets_a_single_attempt(self):
+        broken_server, broken = self.stub(status=500)
+        _, good = self.stub()
+        pool = youtube.InstancePool([broken, _closed_port_url(), good], timeout=1)
+        start = time.monotonic()
+        pool.get("/api/v1/search/")
+        self.assertEqual(broken_server.hits, 1)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_stalled_instance_fails_over_after_one_timeout(self):
+        stalled_server, stalled = self.stub(delay=3)
+        _, good = self.stub()
+        pool = youtube.InstancePool([stalled, good], timeout=1)
+        start = time.monotonic()
+        response = pool.get("/api/v1/search/")
+        self.assertTrue(response.url.startswith(good))
+        self.assertEqual(stalled_server.hits, 1)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_health_check_pings_once(self):
+        broken_server, broken = self.stub(status=503)
+        pool = youtube.InstancePool([broken], timeout=1)
+        pool.check_health()
+        self.assertEqual(broken_server.hits, 1)
+        self.assertEqual(list(pool.outcomes[broken]), [False])
+
+    def test_client_error_is_raised_without_failover(self):
+        first_server, first = self.stub()
+        second_server, second = self.stub()
+        pool = youtube.InstancePool([first, second], timeout=2)
+        with self.assertRaises(requests.HTTPError) as caught:
+            pool.get("/api/v1/videos/removed")
+        self.assertEqual(caught.exception.response.status_code, 404)
+        self.assertEqual(second_server.hits, 0)
+        # A removed video says nothing about the instance
+        self.assertEqual(list(pool.outcomes[first]), [True])
+        self.assertEqual(pool.failed_at[first], 0.0)
+
+    def test_all_instances_down_raises_last_error(self):
+        pool = youtube.InstancePool([_closed_port_url(), _closed_port_url()], timeout=2)
+        with self.assertRaises(requests.ConnectionError):
+            pool.get("/api/v1/search/")
+
+    def test_empty_pool_raises_request_exception(self):
+        with self.assertRaises(requests.RequestException):
+            youtube.InstancePool([]).get("/api/v1/search/")
+
+
+if __name__ == "__main__":
+    unittest.main()
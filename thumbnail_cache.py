@@ -0,0 +1,68 @@
+"""
+Keep the thumbnails of downloaded shorts in one SQLite blob table.
+
+Every thumbnail is resized once to THUMB_SIZE and stored as a small JPEG in
+thumbnails.db next to the shorts, so a preview grid of hundreds of shorts is
+a single query instead of one file (or one MP4 decode) per tile.
+"""
+
+import io
+import os
+
+import PIL.Image, PIL.ImageOps
+
+import sqlite_db
+
+THUMB_SIZE = (160, 90) # Grid tile size, thumbnails are cropped to fill it
+THUMB_QUALITY = 80 # JPEG quality of the stored tiles
+CACHE_NAME = "thumbnails.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    id    TEXT PRIMARY KEY,  -- YouTube videoId
+    image BLOB NOT NULL      -- JPEG, THUMB_SIZE
+)
+"""
+
+
+def resize_thumbnail(data: bytes, size=THUMB_SIZE) -> bytes:
+    """ Crop and scale an image to size, returned as JPEG bytes """
+
+    with PIL.Image.open(io.BytesIO(data)) as image:
+        tile = PIL.ImageOps.fit(image.convert("RGB"), size, PIL.Image.LANCZOS)
+    out = io.BytesIO()
+    tile.save(out, "JPEG", quality=THUMB_QUALITY)
+    return out.getvalue()
+
+
+class ThumbnailCache:
+    """ Grid sized thumbnails of the shorts in video_dir, keyed by videoId """
+
+    def __init__(self, video_dir: str):
+        self.path = os.path.join(video_dir, CACHE_NAME)
+        sqlite_db.create(self.path, [_SCHEMA])
+
+    def __contains__(self, video_id: str) -> bool:
+        with sqlite_db.connect(self.path) as db:
+            return db.execute("SELECT 1 FROM thumbnails WHERE id = ?", (video_id,)).fetchone() is not None
+
+    def put(self, video_id: str, data: bytes):
+        """ Resize a downloaded thumbnail (any format PIL reads) and store it """
+
+        tile = resize_thumbnail(data)
+        with sqlite_db.connect(self.path) as db:
+            sqlite_db.insert_or_replace(db, "thumbnails", ("id", "image"), {"id": video_id, "image": tile})
+
+    def load(self, video_ids=None) -> dict:
+        """ {videoId: PIL image} for video_ids (default all), read in one query """
+
+        with sqlite_db.connect(self.path) as db:
+            rows = db.execute("SELECT id, image FROM thumbnails").fetchall()
+        wanted = None if video_ids is None else set(video_ids)
+        images = {}
+        for video_id, blob in rows:
+            if wanted is None or video_id in wanted:
+                image = PIL.Image.open(io.BytesIO(blob))
+                image.load() # Decode now, this may be a background thread
+                images[video_id] = image
+        return images
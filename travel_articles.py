@@ -1,49 +1,94 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
 import json
 
+import http_client
+from article_store import ArticleStore
+from html_parsing import make_soup
+
+HOMEPAGE = "https://www.bbc.com/travel"
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
                   "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
 }
 
-def get_article_text(url):
+class CrawlStats:
     """
-    Fetches an article from a given URL and extracts its main text.
+    Counts network fetches and HTML parses done during one search,
+    so we can see how much work each fetch_articles() call costs.
     """
-    try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        # Prefer semantic <article> tag
-        article = soup.find("article")
-        if article:
-            paras = article.find_all("p")
-            if paras:
-                return "\n\n".join(p.get_text(strip=True) for p in paras)
-
-        # Fallbacks: BBC uses a few different wrapper classes/data attributes
-        selectors = [
-            'div[data-component="text-block"] p',
-            'div.ssrcss-uf6wea-RichTextComponentWrapper p',  # common RichText wrapper
-            'main p',
-        ]
-        for sel in selectors:
-            paras = soup.select(sel)
-            if paras:
-                return "\n\n".join(p.get_text(strip=True) for p in paras)
-
-        # Last resort: all <p> on page (may include nav/ads)
-        paras = soup.find_all("p")
-        return "\n\n".join(p.get_text(strip=True) for p in paras) if paras else ""
+    def __init__(self):
+        self.fetches = 0
+        self.parses = 0
+        self._lock = threading.Lock()  # pages are crawled from several threads
 
-    except requests.RequestException:
-        return ""
+    def count_fetch(self):
+        with self._lock:
+            self.fetches += 1
 
-def _is_article_html(html: str) -> bool:
-    soup = BeautifulSoup(html, "html.parser")
+    def count_parse(self):
+        with self._lock:
+            self.parses += 1
+
+    def __str__(self):
+        return f"{self.fetches} fetches, {self.parses} parses"
+
+
+# Stats from the most recent fetch_articles() call
+last_search_stats = CrawlStats()
+
+
+def _fetch(url, timeout, stats=None, headers=None):
+    """ GET a page and return the response, counting the fetch """
+    if stats is not None:
+        stats.count_fetch()
+    r = http_client.get(url, headers={**HEADERS, **(headers or {})}, timeout=timeout)
+    r.raise_for_status()
+    return r
+
+
+def _parse(html, stats=None):
+    """ Parse html into a BeautifulSoup document, counting the parse """
+    if stats is not None:
+        stats.count_parse()
+    return make_soup(html)
+
+
+def _extract_article_text(soup) -> str:
+    """
+    Extracts the main text from an already parsed article page.
+    """
+    # Prefer semantic <article> tag
+    article = soup.find("article")
+    if article:
+        paras = article.find_all("p")
+        if paras:
+            return "\n\n".join(p.get_text(strip=True) for p in paras)
+
+    # Fallbacks: BBC uses a few different wrapper classes/data attributes
+    selectors = [
+        'div[data-component="text-block"] p',
+        'div.ssrcss-uf6wea-RichTextComponentWrapper p',  # common RichText wrapper
+        'main p',
+    ]
+    for sel in selectors:
+        paras = soup.select(sel)
+        if paras:
+            return "\n\n".join(p.get_text(strip=True) for p in paras)
+
+    # Last resort: all <p> on page (may include nav/ads)
+    paras = soup.find_all("p")
+    return "\n\n".join(p.get_text(strip=True) for p in paras) if paras else ""
+
+
+def _is_article_soup(soup) -> bool:
+    """
+    Decides from an already parsed page whether it is an article (not a listing).
+    """
     # semantic <article> or BBC text-block nodes
     if soup.find("article"):
         return True
@@ -64,23 +109,107 @@ def _is_article_html(html: str) -> bool:
                     return True
     return False
 
-def fetch_articles(search_term: str) -> str:
+
+def get_article_text(url):
     """
-    Scrapes BBC Travel for articles, filters by search_term, and returns results as a string.
+    Fetches an article from a given URL and extracts its main text.
     """
     try:
-        homepage = "https://www.bbc.com/travel"
-        r = requests.get(homepage, headers=HEADERS, timeout=15)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-    except requests.RequestException as e:
-        return f"Error: Could not connect to BBC Travel. {e}"
-    homepage = "https://www.bbc.com/travel"
-    r = requests.get(homepage, headers=HEADERS, timeout=15)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+        r = _fetch(url, timeout=15)
+    except requests.RequestException:
+        return ""
+    return _extract_article_text(_parse(r.text))
+
+def _is_article_html(html: str) -> bool:
+    return _is_article_soup(_parse(html))
+
+def _extract_title(soup) -> str:
+    """ Returns the article headline, falling back to the page <title> """
+    h1 = soup.find("h1")
+    if h1 and h1.get_text(strip=True):
+        return h1.get_text(strip=True)
+    if soup.title and soup.title.string:
+        return soup.title.string.strip()
+    return ""
+
+
+def _crawl_page(link, stats, host_limits, cached=None):
+    """
+    Fetches and parses one candidate page.
+    Returns an article dict (see article_store), or None if the page is not a usable article.
+    If a cached article is given, a conditional GET is made and the cached copy
+    is returned as-is when the server answers 304 Not Modified.
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    with host_limits[urlparse(link).netloc]:
+        try:
+            # fetch the candidate page
+            r = _fetch(link, timeout=12, stats=stats, headers=headers)
+        except requests.RequestException:
+            return None # Skip this link if it fails
+
+    if cached and r.status_code == 304:
+        return dict(cached, fetched_at=time.time())
+
+    # Parse once and reuse the document for both the check and the extraction
+    page = _parse(r.text, stats)
+    if not _is_article_soup(page):
+        return None # Skip if it's not an article
+
+    text = _extract_article_text(page)
+    if not text or len(text) < 300:
+        return None # Skip if text is too short
+    return {
+        "url": link,
+        "title": _extract_title(page),
+        "text": text,
+        "fetched_at": time.time(),
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }
+
+
+def crawl_pages(links, stats=None, workers=8, per_host=4, deadline=40.0, cached=None):
+    """
+    Crawls the candidate links concurrently and returns a list of article
+    dicts for the ones that are articles, in the same order as links.
+
+    workers   -- number of pages fetched at once
+    per_host  -- most requests allowed in flight to any single host
+    deadline  -- seconds for the whole crawl; pages still loading are dropped
+    cached    -- optional {url: article} used for conditional GETs
+    """
+    cached = cached or {}
+    host_limits = {}
+    for link in links:
+        host_limits.setdefault(urlparse(link).netloc, threading.BoundedSemaphore(per_host))
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(_crawl_page, link, stats, host_limits, cached.get(link)) for link in links]
+    done, not_done = wait(futures, timeout=deadline)
+    if not_done:
+        print(f"Crawl deadline of {deadline}s hit, dropping {len(not_done)} slow pages")
+    # Don't wait for stragglers, they finish in the background and are ignored
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    pages = []
+    for future in futures:
+        if future in done and future.exception() is None and future.result():
+            pages.append(future.result())
+    return pages
+
+
+def _candidate_links(stats=None):
+    """ Collects candidate article links from the Travel homepage """
+    r = _fetch(HOMEPAGE, timeout=15, stats=stats)
+    soup = _parse(r.text, stats)
 
-    # collect candidate links from the Travel homepage
     anchors = soup.select('a[href^="/travel/"], a[href^="/news/stories/"]')
     pagelinks = []
     seen = set()
@@ -88,7 +217,7 @@ def fetch_articles(search_term: str) -> str:
         href = a.get("href")
         if not href:
             continue
-        full = urljoin(homepage, href.split("#", 1)[0])
+        full = urljoin(HOMEPAGE, href.split("#", 1)[0])
         if full in seen:
             continue
         seen.add(full)
@@ -96,42 +225,20 @@ def fetch_articles(search_term: str) -> str:
         if len(pagelinks) >= 30: # Limit to 30 links to keep it fast
             break
 
-    results = []
-    search_term_lower = search_term.lower()
-
-    for link in pagelinks:
-        try:
-            # fetch the candidate page
-            r2 = requests.get(link, headers=HEADERS, timeout=12)
-            r2.raise_for_status()
-        except requests.RequestException:
-            continue # Skip this link if it fails
+    # Skip sections we never want before spending a request on them
+    return [
+        link for link in pagelinks
+        if "cultural-experiences" not in link and "worlds-table" not in link and "/destinations/" not in link
+    ]
 
-        if not _is_article_html(r2.text):
-            continue # Skip if it's not an article
 
-        text = get_article_text(link)
-        if not text or len(text) < 300:
-            continue # Skip if text is too short
-        
-        str_link = str(link)
-        
-        # Filter: check for negative keywords
-        if "cultural-experiences" in str_link or "worlds-table" in str_link or "/destinations/" in str_link:
-            continue
-            
-        # Filter: check for positive search term
-        # If search_term is blank, match all (as per original script)
-        is_match = False
-        if not search_term_lower:
-            is_match = True
-        elif search_term_lower in text.lower():
-            is_match = True
-
-        if is_match:
-            result_string = f"URL: {link}\nLength: {len(text)}\n\n{text[:1000]}...\n\n"
-            result_string += ("=" * 80 + "\n\n")
-            results.append(result_string)
+def _format_results(search_term, articles) -> str:
+    results = []
+    for article in articles:
+        text = article["text"]
+        result_string = f"URL: {article['url']}\nLength: {len(text)}\n\n{text[:1000]}...\n\n"
+        result_string += ("=" * 80 + "\n\n")
+        results.append(result_string)
 
     if not results:
         return f"No articles found matching '{search_term}'."
@@ -139,6 +246,74 @@ def fetch_articles(search_term: str) -> str:
     return "".join(results)
 
 
+def refresh_store(store=None, workers: int = 8, per_host: int = 4, deadline: float = 120.0) -> str:
+    """
+    Updates the article store: new homepage links are crawled, and every
+    stored article is re-checked with a conditional GET (ETag / Last-Modified).
+    Returns a short summary line.
+    """
+    store = store if store is not None else ArticleStore()
+    stats = CrawlStats()
+
+    stored = {a["url"]: a for a in store.all()}
+    try:
+        links = _candidate_links(stats)
+    except requests.RequestException as e:
+        print(f"[warn] could not load BBC Travel homepage, only re-checking stored pages: {e}")
+        links = []
+    links += [url for url in stored if url not in links]
+
+    articles = crawl_pages(links, stats, workers=workers, per_host=per_host, deadline=deadline, cached=stored)
+    for article in articles:
+        store.put(article)
+
+    new = sum(1 for a in articles if a["url"] not in stored)
+    return f"Refreshed {len(articles)} articles ({new} new): {stats}"
+
+
+def fetch_articles(search_term: str, workers: int = 8, per_host: int = 4, deadline: float = 40.0,
+                   store=None, offline_first: bool = True) -> str:
+    """
+    Scrapes BBC Travel for articles, filters by search_term, and returns results as a string.
+
+    The local article store is searched first; a live crawl only happens when
+    it has no match (or offline_first is False). Crawled articles are saved to
+    the store. Candidate pages are crawled concurrently, see crawl_pages().
+    """
+    global last_search_stats
+    stats = CrawlStats()
+    last_search_stats = stats
+
+    store = store if store is not None else ArticleStore()
+    if offline_first:
+        stored = store.search(search_term)
+        if stored:
+            print(f"Found {len(stored)} stored articles for '{search_term}'")
+            return _format_results(search_term, stored)
+
+    try:
+        pagelinks = _candidate_links(stats)
+    except requests.RequestException as e:
+        return f"Error: Could not connect to BBC Travel. {e}"
+
+    articles = crawl_pages(pagelinks, stats, workers=workers, per_host=per_host, deadline=deadline)
+    for article in articles:
+        store.put(article)
+
+    # Match with the same index query as the offline path, restricted to what was just crawled
+    # If search_term is blank, match all (as per original script)
+    if search_term.strip():
+        crawled = {a["url"] for a in articles}
+        matches = [a for a in store.search(search_term, limit=len(store)) if a["url"] in crawled]
+    else:
+        matches = articles
+
+    print(f"Searched BBC Travel for '{search_term}': {stats}")
+    print(http_client.latency_summary())
+
+    return _format_results(search_term, matches)
+
+
 if __name__ == "__main__":
     # This block now just tests the function
     term = input("Enter search terms (comma-separated) or leave blank to get all articles: ")
@@ -152,7 +327,7 @@ if __name__ == "__main__":
     for link in pagelinks:
         try:
             # fetch the candidate page and decide if it's an article (not a listing)
-            r2 = requests.get(link, headers=HEADERS, timeout=12)
+            r2 = http_client.get(link, headers=HEADERS, timeout=12)
             r2.raise_for_status()
         except requests.RequestException:
             continue
@@ -1,5 +1,14 @@
 import tkinter as tk
-from tkinter import Canvas, Entry, Text, Button
+from tkinter import Canvas, Entry, Button, Scrollbar
+import threading
+import PIL.ImageTk
+
+from shorts_library import ShortsLibrary
+from thumbnail_cache import THUMB_SIZE, ThumbnailCache
+
+SHORTS_PATH = "videos/"
+TILE_PAD = 14 # Space between preview tiles
+TITLE_HEIGHT = 20 # Room under each tile for the title
 
 class App:
     def __init__(self, root):
@@ -265,27 +274,80 @@ class App:
             font=("Inter", 18 * -1)
         )
 
-        # --- Large Content Area (Placeholder) ---
-        # Using a Text widget as a placeholder
-        self.content_area = Text(
+        # --- Preview Grid ---
+        # One canvas holds every thumbnail tile, it scrolls vertically
+        self.grid_canvas = Canvas(
             self.main_canvas,
-            bd=1,
             bg="#F5F5F5", # Light grey background
-            fg="#000716",
             highlightthickness=1,
-            highlightcolor="#E0E0E0", # Light grey border
-            highlightbackground="#E0E0E0",
-            relief="flat",
-            font=("Inter", 14)
+            highlightbackground="#E0E0E0", # Light grey border
+            bd=0
         )
-        self.content_area.place(
+        self.grid_canvas.place(
             x=50.0, y=220.0, # Adjust
-            width=1080.0, # Adjust
+            width=1066.0, # Adjust
             height=650.0  # Adjust
         )
-        self.content_area.insert("1.0", "This is where your video content would be listed...")
-        self.content_area.config(state="disabled") # Make it read-only
+        self.grid_scrollbar = Scrollbar(self.main_canvas, orient="vertical", command=self.grid_canvas.yview)
+        self.grid_scrollbar.place(x=1116.0, y=220.0, width=14.0, height=650.0)
+        self.grid_canvas.configure(yscrollcommand=self.grid_scrollbar.set)
+        self.grid_canvas.bind("<MouseWheel>", lambda e: self.grid_canvas.yview_scroll(-e.delta // 120, "units"))
+
+        self.tile_photos = [] # Tk drops images without a Python reference
+        self.grid_canvas.create_text(20, 20, anchor="nw", text="Loading your videos...",
+                                     fill="#000716", font=("Inter", 14))
+        self.run_in_thread(self.load_previews)
+
+    def run_in_thread(self, target, *args):
+        """Runs a blocking file I/O task in a new thread so the UI doesn't freeze."""
+        thread = threading.Thread(target=target, args=args)
+        thread.daemon = True # Allows app to close
+        thread.start()
+
+    def load_previews(self):
+        """
+        Reads the library and every thumbnail (one query on the thumbnail cache).
+        This runs on a separate background thread.
+        """
+        try:
+            shorts = ShortsLibrary(SHORTS_PATH).all()
+            images = ThumbnailCache(SHORTS_PATH).load(s["id"] for s in shorts)
+        except Exception as e:
+            print(f"Could not load the video previews: {e}")
+            shorts, images = [], {}
+        self.root.after(0, self.show_previews, shorts, images)
+
+    def show_previews(self, shorts, images):
+        """
+        Lays the thumbnails out in a grid.
+        This runs back on the main UI thread.
+        """
+        self.grid_canvas.delete("all")
+        self.tile_photos = []
+        if not shorts:
+            self.grid_canvas.create_text(20, 20, anchor="nw", text="No videos downloaded yet.",
+                                         fill="#000716", font=("Inter", 14))
+            return
+
+        tile_w, tile_h = THUMB_SIZE[0] + TILE_PAD, THUMB_SIZE[1] + TITLE_HEIGHT + TILE_PAD
+        columns = max(1, (1066 - TILE_PAD) // tile_w)
+        for n, short in enumerate(shorts):
+            x = TILE_PAD + (n % columns) * tile_w
+            y = TILE_PAD + (n // columns) * tile_h
+            image = images.get(short["id"])
+            if image is not None:
+                photo = PIL.ImageTk.PhotoImage(image)
+                self.tile_photos.append(photo)
+                self.grid_canvas.create_image(x, y, anchor="nw", image=photo)
+            else:
+                self.grid_canvas.create_rectangle(x, y, x + THUMB_SIZE[0], y + THUMB_SIZE[1],
+                                                  fill="#E0E0E0", outline="")
+            title = short["title"] if len(short["title"]) <= 24 else short["title"][:23] + "…"
+            self.grid_canvas.create_text(x, y + THUMB_SIZE[1] + 4, anchor="nw", text=title,
+                                         fill="#212121", font=("Inter", 12 * -1))
 
+        rows = (len(shorts) + columns - 1) // columns
+        self.grid_canvas.configure(scrollregion=(0, 0, 1066, TILE_PAD + rows * tile_h))
 
 if __name__ == "__main__":
     root = tk.Tk()
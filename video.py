@@ -1,36 +1,28 @@
 import tkinter as tk
 import tkinter.font
 from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
 import cv2
+import numpy as np
 import PIL.Image, PIL.ImageTk
-import moviepy
 import os
 import pyaudio
+import threading
+import time
 import wave
 
+import audio_cache
 import youtube
+from shorts_library import ShortsLibrary
 
 # Instantiate PyAudio
 PYAUDIO = pyaudio.PyAudio()
 
 SHORTS_PATH = "videos/"
-
-def extract_audio(video_path: str, audio_path: str):
-    video_clip = moviepy.VideoFileClip(video_path)
-
-    # Extract the audio from the video clip
-    audio_clip = video_clip.audio
-
-    if not os.path.exists(os.path.dirname(audio_path)):
-        print(f"{audio_path} does not exist. Creating {audio_path}")
-        os.mkdir(audio_path)
-
-    # Write the audio to a separate file
-    audio_clip.write_audiofile(audio_path)
-
-    audio_clip.close()
-    video_clip.close()
-
+BUFFER_FRAMES = 8 # Frames decoded ahead of playback
+MAX_VIEWPORT = (540, 960) # Largest size a short is shown at, frames are scaled down to fit
+CONTROLS_HEIGHT = 160 # Room left on screen for the buttons below the canvas
+PRELOAD_AHEAD = 2 # Upcoming shorts opened in the background
 
 class App:
     def __init__(self, root, title):
@@ -44,11 +36,19 @@ class App:
 
         # Create a canvas for the short
         self.canvas = tk.Canvas(root, width=1, height=1)
+        self.viewport = (min(MAX_VIEWPORT[0], root.winfo_screenwidth()),
+                         min(MAX_VIEWPORT[1], root.winfo_screenheight() - CONTROLS_HEIGHT))
+        self.preloader = Preloader(self.viewport)
         self.canvas.pack()
 
         self.video = None
         self.audio = None
-        self.ratio = 0
+        self.clock = PlaybackClock()
+        self.photo = None # One PhotoImage per video, frames are pasted into it
+        self.image_item = None # The canvas item showing self.photo
+        self.dropped = 0
+        self.blits = 0
+        self.blit_time = 0.0 # Seconds spent putting frames on screen
         self.playing = False
         if self.shorts:
             self.disp_video(0)
@@ -60,49 +60,108 @@ class App:
         self.downloadbtn = ttk.Button(self.root, text="DOWNLOAD", command=self.on_download)
         self.downloadbtn.pack()
 
+        self.status = ttk.Label(self.root, text="")
+        self.status.pack()
+        self.downloading = 0 # Searches still downloading
+        self.downloaded = 0 # Shorts added by those searches so far
+
         self.nextbtn = ttk.Button(self.root, text=">>>", command=lambda:self.disp_video(self.shortidx + 1))
         self.nextbtn.pack()
 
         self.playpausebtn = ttk.Button(self.root, text="PLAY/PAUSE", command=self.toggle_play_pause)
         self.playpausebtn.pack()
 
-        # After it is called once, the update method will be automatically called every delay milliseconds
-        # self.delay = int(1000/self.video.fps)
-        self.delay = 1
+        # After it is called once, the update method reschedules itself for the next frame's due time
+        self.idle_delay = 50 # Milliseconds between checks while nothing is playing
         self.update()
 
         self.root.mainloop()
 
     def toggle_play_pause(self):
+        if self.audio is None:
+            return
         self.playing = not self.playing
+        if self.playing:
+            self.clock.resume()
+            self.audio.resume()
+        else:
+            self.clock.pause()
+            self.audio.pause()
 
     def load_videos(self):
         if not os.path.exists(os.path.dirname(SHORTS_PATH)):
             return
 
-        for file in os.listdir(SHORTS_PATH):
-            path = os.path.join(SHORTS_PATH, file)
-            print(f"Loading {path}")
-            self.shorts.append(path)
+        # The library index knows every downloaded short, the folder is only
+        # checked for files saved before the library existed
+        library = ShortsLibrary(SHORTS_PATH)
+        imported = library.import_untracked()
+        if imported:
+            print(f"Added {imported} earlier downloads to the shorts library")
+        for short in library.all():
+            print(f"Loading {short['video_path']} ({short['title']})")
+            self.shorts.append(short["video_path"])
 
     def on_download(self):
-        search = self.searchbox.get(1.0, "end")
+        search = self.searchbox.get(1.0, "end").strip()
         self.searchbox.delete(1.0, "end") # Clear the search box
+        if not search:
+            return
 
-        if not self.shorts:
-            self.shorts.append(youtube.download_videos(search, 15, SHORTS_PATH))
-            self.disp_video(0)
-        else:
-            self.shorts.append(youtube.download_videos(search, 15, SHORTS_PATH))
+        self.downloading += 1
+        self.status.configure(text=f"Downloading \"{search}\"...")
+        thread = threading.Thread(target=self.download_worker, args=(search,))
+        thread.daemon = True # Allows app to close
+        thread.start()
+
+    def download_worker(self, search):
+        """ Runs on a background thread, every result is handed to the Tk thread with root.after """
+        try:
+            filenames, failed = youtube.download_videos(search, 15, SHORTS_PATH,
+                                                        on_video=lambda path: self.root.after(0, self.add_short, path))
+            message = f"Downloaded {len(filenames)}, {len(failed)} failed" if failed else None
+        except Exception as e:
+            message = f"Download failed: {e}"
+        self.root.after(0, self.finish_download, message)
+
+    def add_short(self, path):
+        """ Put a finished download in the playlist, it can be watched right away """
+        if path in self.shorts:
+            return
+        self.shorts.append(path)
+        self.downloaded += 1
+        self.status.configure(text=f"Downloaded {self.downloaded} shorts...")
+
+        if self.video is None and not self.playing:
+            self.disp_video(len(self.shorts) - 1)
+        elif len(self.shorts) - 1 <= self.shortidx + PRELOAD_AHEAD:
+            self.preloader.preload(self.shorts[self.shortidx + 1:self.shortidx + 1 + PRELOAD_AHEAD])
+
+    def finish_download(self, message):
+        self.downloading -= 1
+        if message is not None:
+            print(message)
+            self.status.configure(text=message)
+        elif not self.downloading:
+            self.status.configure(text=f"Finished downloading, {len(self.shorts)} shorts")
+        if not self.downloading:
+            self.downloaded = 0
 
     def disp_video(self, idx):
         self.shortidx = idx
         video_path = self.shorts[self.shortidx]
-        audio_path = f"cache/{os.path.splitext(os.path.basename(video_path))[0]}.wav"
+        if self.audio is not None:
+            # Stop the previous short's sound
+            self.audio.close()
+            self.audio = None
+        if self.video is not None:
+            self.video.close()
+            self.video = None
         try:
-            extract_audio(video_path, audio_path)
-        except:
-            print(f"Could not load audio for video {video_path}")
+            # Normally already opened by the preloader while the previous short played
+            self.video, self.audio = self.preloader.take(video_path)
+        except Exception as e:
+            print(f"Could not load video {video_path}: {e}")
             self.playing = False
             msg = f"Could not load video {video_path}"
             font = tk.font.Font(family="Georgia", size=17)
@@ -111,76 +170,292 @@ class App:
             self.canvas.configure(width=width, height=height)
             self.canvas.create_text((width/2, height/2), text=msg, font=font)
             return
-        self.video = VideoPlayer(video_path)
-        self.audio = AudioPlayer(audio_path)
         self.canvas.configure(width=self.video.width, height=self.video.height)
-        self.ratio = int(self.audio.fps/self.video.fps)
+        self.canvas.delete("all")
+        self.photo = PIL.ImageTk.PhotoImage("RGB", (self.video.width, self.video.height))
+        self.image_item = self.canvas.create_image(0, 0, image = self.photo, anchor = tk.NW)
+        self.dropped = 0
+        self.blits = 0
+        self.blit_time = 0.0
+
+        # Audio and the clock start together, video frames follow the clock
+        self.clock.start()
+        self.audio.resume()
         self.playing = True
 
+        # Warm up the next shorts while this one plays
+        self.preloader.preload(self.shorts[idx + 1:idx + 1 + PRELOAD_AHEAD])
+
     def update(self):
+        delay = self.idle_delay
         if self.playing:
-            # Get a frame from the video source
-            self.audio.play_frames(self.ratio)
-            ret, frame = self.video.next_frame()
+            now = self.clock.time()
+
+            # Running late: drop frames whose display slot has already passed
+            item = self.video.peek()
+            while item is not None and item[0] + self.video.frame_duration <= now:
+                self.video.release()
+                self.dropped += 1
+                item = self.video.peek()
+
+            if item is not None and item[0] <= now:
+                # The frame is only borrowed from the decoder, paste copies it into the Tk image
+                start = time.perf_counter()
+                self.photo.paste(PIL.Image.fromarray(item[1]))
+                self.blit_time += time.perf_counter() - start
+                self.blits += 1
+                self.video.release()
+                item = self.video.peek()
+
+            if item is not None:
+                # Sleep until the next frame is due
+                delay = max(1, int((item[0] - self.clock.time()) * 1000))
+            elif self.video.finished:
+                blit_ms = self.blit_time / self.blits * 1000 if self.blits else 0.0
+                print(f"Finished playing, {self.blits} frames shown ({blit_ms:.2f} ms each), dropped {self.dropped} frames")
+                self.playing = False
+                self.clock.pause()
+                self.audio.pause()
+            else:
+                # The decoder is behind, check again shortly
+                delay = max(1, int(self.video.frame_duration * 250))
+
+        self.root.after(delay, self.update)
+
+
+class Preloader:
+    """
+    Opens upcoming shorts on background threads: the audio is extracted if
+    needed, the WAV and its PyAudio stream are opened, and the VideoPlayer
+    starts filling its frame buffer. Switching to a preloaded short then
+    only has to start playback.
+    """
+
+    def __init__(self, viewport, ahead=PRELOAD_AHEAD):
+        self.viewport = viewport
+        self.executor = ThreadPoolExecutor(max_workers=ahead)
+        self.pending = {} # video path -> Future of (VideoPlayer, AudioPlayer)
+
+    def open(self, path):
+        # Normally already extracted when the video was downloaded
+        audio_path = audio_cache.ensure_audio(path)
+        video = VideoPlayer(path, self.viewport)
+        try:
+            return (video, AudioPlayer(audio_path))
+        except:
+            video.close()
+            raise
+
+    def preload(self, paths):
+        """ Start opening paths, and drop preloaded shorts that are no longer upcoming """
+
+        for path in list(self.pending):
+            if path not in paths:
+                self._discard(self.pending.pop(path))
+        for path in paths:
+            if path not in self.pending:
+                self.pending[path] = self.executor.submit(self.open, path)
+
+    def take(self, path):
+        """ Return the (VideoPlayer, AudioPlayer) for path, opening it now if it wasn't preloaded """
+
+        future = self.pending.pop(path, None)
+        if future is None:
+            return self.open(path)
+        # Still in progress: waiting for it is quicker than starting over
+        return future.result()
+
+    def _discard(self, future):
+        if future.cancel():
+            return
+
+        def close(f):
+            if f.exception() is None:
+                video, audio = f.result()
+                video.close()
+                audio.close()
+        future.add_done_callback(close)
+
+
+class PlaybackClock:
+    """ Monotonic master clock for A/V sync, in seconds since playback started """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.paused_at = None
 
-            if ret:
-                self.photo = PIL.ImageTk.PhotoImage(image = PIL.Image.fromarray(frame))
-                self.canvas.create_image(0, 0, image = self.photo, anchor = tk.NW)
+    def start(self):
+        self.started = time.monotonic()
+        self.paused_at = None
 
-        self.root.after(self.delay, self.update)
+    def pause(self):
+        if self.paused_at is None:
+            self.paused_at = time.monotonic()
+
+    def resume(self):
+        if self.paused_at is not None:
+            # Shift the start so the paused interval doesn't count
+            self.started += time.monotonic() - self.paused_at
+            self.paused_at = None
+
+    def time(self):
+        now = self.paused_at if self.paused_at is not None else time.monotonic()
+        return now - self.started
 
 
 class AudioPlayer:
+    """ Plays a WAV file from a PyAudio callback stream, so nothing blocks the UI """
+
     def __init__(self, path):
         self.f = wave.open(path, "rb") 
         self.samplewidth = self.f.getsampwidth()
         self.channels = self.f.getnchannels()
         self.fps = self.f.getframerate()
 
-
         fmt = PYAUDIO.get_format_from_width(self.samplewidth)
-        self.stream = PYAUDIO.open(format=fmt, channels=self.channels, rate=self.fps, output=True)  
-
+        self.stream = PYAUDIO.open(format=fmt, channels=self.channels, rate=self.fps, output=True,
+                                   stream_callback=self.callback, start=False)
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """ Called by PyAudio on its own thread whenever it needs more samples """
+        data = self.f.readframes(frame_count)
+        if len(data) < frame_count * self.samplewidth * self.channels:
+            return (data, pyaudio.paComplete)
+        return (data, pyaudio.paContinue)
+
+    def resume(self):
+        if self.stream.is_active():
+            return
+        if not self.stream.is_stopped():
+            # The callback returned paComplete: inactive but not stopped, and
+            # PortAudio only starts stopped streams
+            self.stream.stop_stream()
+        self.stream.start_stream()
+
+    def pause(self):
+        if not self.stream.is_stopped():
+            self.stream.stop_stream()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+            self.f.close()
 
-    def play_frames(self, n: int):
-        data = self.f.readframes(n)  
-        if data:
-            self.stream.write(data)  
-          
-          
     def __del__(self):
         # Close audio stream when destroyed
-        self.stream.stop_stream()
-        self.stream.close()
+        self.close()
 
 
 class VideoPlayer:
-    def __init__(self, path):
+    """
+    Decodes a video on a background thread into a ring buffer of preallocated
+    RGB frames. The UI thread takes frames with peek() and hands the slot back
+    with release(), so frames are never copied between the two.
+    """
+
+    def __init__(self, path, viewport=None, buffer_frames=BUFFER_FRAMES):
         # Open the video source
         self.video = cv2.VideoCapture(path)
         if not self.video.isOpened():
             raise ValueError("Unable to open video source", path)
 
         # Get video source width and height
-        self.width = self.video.get(cv2.CAP_PROP_FRAME_WIDTH)
-        self.height = self.video.get(cv2.CAP_PROP_FRAME_HEIGHT)
-        self.fps = self.video.get(cv2.CAP_PROP_FPS)
-
-    def next_frame(self):
-        """ Return the next frame of the video """
-
+        self.source_width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.source_height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        # Frames are scaled down while decoding so they come out at display size
+        scale = 1.0
+        if viewport is not None and self.source_width and self.source_height:
+            scale = min(1.0, viewport[0] / self.source_width, viewport[1] / self.source_height)
+        self.width = max(1, round(self.source_width * scale))
+        self.height = max(1, round(self.source_height * scale))
+        self.scaled = scale < 1.0
+
+        self.fps = self.video.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_duration = 1.0 / self.fps
+
+        self.frames = [np.empty((self.height, self.width, 3), np.uint8) for _ in range(buffer_frames)]
+        self.pts = [0.0] * buffer_frames # Presentation time in seconds of each slot
+        self.head = 0 # Slot of the oldest decoded frame
+        self.count = 0 # Number of decoded frames waiting to be shown
+        self.eof = False
+        self.stopped = False
+        self.cond = threading.Condition()
+
+        self.thread = threading.Thread(target=self._decode, daemon=True)
+        self.thread.start()
+
+    def _decode(self):
+        bgr = None
+        small = np.empty((self.height, self.width, 3), np.uint8) if self.scaled else None
+        index = 0
+        while True:
+            with self.cond:
+                while self.count == len(self.frames) and not self.stopped:
+                    self.cond.wait()
+                if self.stopped:
+                    return
+                slot = (self.head + self.count) % len(self.frames)
+
+            # The slot is free, so it can be filled without holding the lock
+            ret, bgr = self.video.read(bgr)
+            if not ret:
+                with self.cond:
+                    self.eof = True
+                    self.cond.notify_all()
+                return
+            if self.scaled:
+                # Shrink first so the colour conversion touches fewer pixels
+                bgr_out = cv2.resize(bgr, (self.width, self.height), dst=small, interpolation=cv2.INTER_AREA)
+            else:
+                bgr_out = bgr
+            rgb = cv2.cvtColor(bgr_out, cv2.COLOR_BGR2RGB, dst=self.frames[slot])
+            if rgb is not self.frames[slot]:
+                self.frames[slot] = rgb # Frame size differs from what the container reported
+
+            with self.cond:
+                self.pts[slot] = index * self.frame_duration
+                self.count += 1
+                self.cond.notify_all()
+            index += 1
+
+    def peek(self):
+        """ Return (pts, frame) of the next decoded frame without waiting, or None """
+
+        with self.cond:
+            if self.count == 0:
+                return None
+            return (self.pts[self.head], self.frames[self.head])
+
+    def release(self):
+        """ Give the frame returned by peek() back to the decoder """
+
+        with self.cond:
+            self.head = (self.head + 1) % len(self.frames)
+            self.count -= 1
+            self.cond.notify_all()
+
+    @property
+    def finished(self):
+        """ True once every frame has been decoded and shown """
+
+        with self.cond:
+            return self.eof and self.count == 0
+
+    def close(self):
+        if hasattr(self, "thread"):
+            with self.cond:
+                self.stopped = True
+                self.cond.notify_all()
+            self.thread.join()
         if self.video.isOpened():
-            ret, frame = self.video.read()
-            if ret:
-                # Return a boolean success flag and the current frame converted to BGR
-                return (True, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-
-        return (ret, None)
+            self.video.release()
 
     # Release the video source when the object is destroyed
     def __del__(self):
-        if self.video.isOpened():
-            self.video.release()
+        self.close()
 
 
 def main():
@@ -2,15 +2,145 @@
 Download youtube shorts using invidious api
 """
 
-import requests
 import json
 import os
+import re
+import threading
+import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
-import itertools
 
+import requests
 
-instance = "inv.perditum.com"
-# instance = "invidious.reallyaweso.me"
+import audio_cache
+import downloader
+import http_client
+from shorts_library import ShortsLibrary, video_id_for, video_path_for
+from thumbnail_cache import THUMB_SIZE, ThumbnailCache
+
+
+# Invidious instances to use, the pool ranks them by how they have been responding
+INSTANCES = [
+    "https://inv.perditum.com",
+    "https://invidious.reallyaweso.me",
+]
+HEALTH_PATH = "/api/v1/stats" # Cheap endpoint every instance serves
+HEALTH_CHECK_INTERVAL = 300 # Seconds before download_videos checks the instances again
+FAILURE_COOLDOWN = 60 # Seconds an instance that just failed is tried last
+INSTANCE_SAMPLES = 20 # Most recent requests remembered per instance
+
+# Format selection budget, see select_format()
+MAX_SHORT_SIDE = 540 # Shorts are shown at most 540 pixels wide (video.MAX_VIEWPORT)
+MAX_VIDEO_BYTES = 25 * 1024 * 1024 # Storage budget per short
+BANDWIDTH = 4_000_000 # Bits per second we expect to download at
+MAX_DOWNLOAD_SECONDS = 30 # Longest a single short should take at BANDWIDTH
+CODEC_PREFERENCE = ("avc1", "vp09", "vp9", "av01") # Best first, avc1 decodes fastest in OpenCV
+
+
+# --- Instances ---
+
+class InstancePool:
+    """
+    Sends API requests to the best of several Invidious instances, ranked by
+    recent latency and error rate, and fails over to the next one when a
+    request errors.
+    """
+
+    def __init__(self, instances, timeout=10):
+        self.instances = [url.rstrip("/") for url in instances]
+        self.timeout = timeout
+        self.latencies = {url: deque(maxlen=INSTANCE_SAMPLES) for url in self.instances}
+        self.outcomes = {url: deque(maxlen=INSTANCE_SAMPLES) for url in self.instances} # True = success
+        self.failed_at = {url: 0.0 for url in self.instances}
+        self.checked_at = 0.0
+        self._lock = threading.Lock()  # used from the download threads
+
+    def record(self, url: str, latency=None):
+        """ Record a request to the instance url, latency None means it failed """
+        with self._lock:
+            self.outcomes[url].append(latency is not None)
+            if latency is None:
+                self.failed_at[url] = time.monotonic()
+            else:
+                self.latencies[url].append(latency)
+
+    def score(self, url: str) -> float:
+        """ Mean latency, inflated by the error rate; lower is better """
+        with self._lock:
+            latencies, outcomes = self.latencies[url], self.outcomes[url]
+            if not outcomes:
+                return 0.0 # Untried instances keep their place in the list
+            mean = sum(latencies) / len(latencies) if latencies else self.timeout
+            error_rate = outcomes.count(False) / len(outcomes)
+            return mean * (1 + 10 * error_rate)
+
+    def ranked(self):
+        """ Instances best first, those that failed in the last FAILURE_COOLDOWN seconds last """
+        now = time.monotonic()
+        # sorted() is stable, so ties keep the configured order
+        return sorted(self.instances, key=lambda url: (now - self.failed_at[url] < FAILURE_COOLDOWN, self.score(url)))
+
+    def check_health(self):
+        """ Ping every instance at once and record how each one answered """
+
+        def ping(url):
+            start = time.perf_counter()
+            try:
+                response = http_client.get(url + HEALTH_PATH, timeout=self.timeout, retries=False)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"Instance {url} is unhealthy: {e}")
+                self.record(url)
+                return
+            self.record(url, time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=len(self.instances)) as executor:
+            list(executor.map(ping, self.instances))
+        self.checked_at = time.monotonic()
+
+    def check_health_if_stale(self):
+        if time.monotonic() - self.checked_at > HEALTH_CHECK_INTERVAL:
+            self.check_health()
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """
+        GET path (e.g. "/api/v1/search/") from the best instance. Connection
+        errors, timeouts, 429 and 5xx answers count against the instance and
+        the next one is tried. Other errors, such as a 404 for a removed
+        video, are about the request, so they are raised right away.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        error = None
+        for url in self.ranked():
+            start = time.perf_counter()
+            try:
+                # One attempt per instance, failing over is the retry
+                response = http_client.get(url + path, retries=False, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    self.record(url, time.perf_counter() - start)
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            print(f"Instance {url} failed ({error}), trying the next one")
+            self.record(url)
+        if error is None:
+            raise requests.RequestException("No Invidious instances configured")
+        raise error
+
+    def summary(self) -> str:
+        lines = []
+        for url in self.ranked():
+            with self._lock:
+                outcomes = self.outcomes[url]
+                failures = outcomes.count(False)
+            lines.append(f"{url}: {len(outcomes)} requests, {failures} failed, score {self.score(url):.3f}")
+        return "\n".join(lines)
+
+
+pool = InstancePool(INSTANCES)
 
 
 def get_search_results(search: str, num: int):
@@ -24,7 +154,7 @@ def get_search_results(search: str, num: int):
         "type": "video",
     }
 
-    response = requests.get(f"https://{instance}/api/v1/search/", params=p)
+    response = pool.get("/api/v1/search/", params=p)
     x = json.loads(response.text)
 
     num_fetched = len(x)
@@ -35,49 +165,194 @@ def get_search_results(search: str, num: int):
     return result
 
 
-def save_thumbnail(id: str, dir: str):
-    """ Save the thumbnail from the given video id to a file """
-
-    response = requests.get(f"https://{instance}/api/v1/videos/{id}")
-    x = json.loads(response.text)
-
-
-
-def save_video(id: str, dir: str):
-    """ Save the video from the given the video id to a file """
-
-    response = requests.get(f"https://{instance}/api/v1/videos/{id}")
+def _thumbnail_url(x: dict):
+    """ The smallest thumbnail at least as big as a grid tile, else the biggest one """
+    thumbnails = [t for t in x.get("videoThumbnails") or [] if t.get("url")]
+    if not thumbnails:
+        return None
+    big_enough = [t for t in thumbnails if (t.get("width") or 0) >= THUMB_SIZE[0]]
+    if big_enough:
+        return min(big_enough, key=lambda t: t.get("width") or 0)["url"]
+    return max(thumbnails, key=lambda t: t.get("width") or 0)["url"]
+
+
+def save_thumbnail(id: str, dir: str, x=None, library=None):
+    """ Save the thumbnail from the given video id into the thumbnail cache in dir """
+
+    if x is None:
+        response = pool.get(f"/api/v1/videos/{id}")
+        x = json.loads(response.text)
+
+    url = _thumbnail_url(x)
+    if url is None:
+        print(f"No thumbnail for video {id}")
+        return None
+
+    # Some instances give thumbnail urls relative to themselves
+    response = pool.get(url) if url.startswith("/") else http_client.get(url)
+    response.raise_for_status()
+
+    cache = ThumbnailCache(dir)
+    cache.put(id, response.content)
+    if library is not None:
+        library.set_thumbnail(id, cache.path)
+    return cache.path
+
+
+# --- Format selection ---
+
+class FormatStats:
+    """ Bytes downloaded with select_format() compared with always taking the last formatStream """
+
+    def __init__(self):
+        self.downloaded = 0
+        self.baseline = 0
+        self._lock = threading.Lock()  # videos are saved from several threads
+
+    def count(self, downloaded: int, baseline: int):
+        with self._lock:
+            self.downloaded += downloaded
+            self.baseline += baseline
+
+    def __str__(self):
+        saved = self.baseline - self.downloaded
+        return f"{self.downloaded / 1e6:.1f} MB downloaded, {saved / 1e6:.1f} MB saved by format selection"
+
+
+def _short_side(fmt: dict):
+    """ The smaller of width and height, e.g. 720 for a 720x1280 short, or None """
+    match = re.match(r"(\d+)x(\d+)", fmt.get("size") or "")
+    if match:
+        return min(int(match.group(1)), int(match.group(2)))
+    match = re.match(r"(\d+)p", fmt.get("qualityLabel") or fmt.get("resolution") or "")
+    return int(match.group(1)) if match else None
+
+
+def _codec_rank(fmt: dict) -> int:
+    codecs = fmt.get("type") or ""
+    for rank, codec in enumerate(CODEC_PREFERENCE):
+        if codec in codecs:
+            return len(CODEC_PREFERENCE) - rank
+    return 0
+
+
+def estimate_size(fmt: dict, info: dict):
+    """
+    Estimated bytes of a format: its clen, else bitrate x duration, else the
+    matching adaptive video stream plus an audio stream. None if unknown.
+    """
+    if fmt.get("clen"):
+        return int(fmt["clen"])
+    duration = int(info.get("lengthSeconds") or 0)
+    if fmt.get("bitrate") and duration:
+        return int(fmt["bitrate"]) * duration // 8
+
+    adaptive = info.get("adaptiveFormats") or []
+    side = _short_side(fmt)
+    videos = [f for f in adaptive if f.get("clen") and (f.get("type") or "").startswith("video/")
+              and _short_side(f) == side]
+    audios = [int(f["clen"]) for f in adaptive if f.get("clen") and (f.get("type") or "").startswith("audio/")]
+    if not videos:
+        return None
+    # Same codec family if there is one
+    videos.sort(key=lambda f: _codec_rank(f) == _codec_rank(fmt), reverse=True)
+    return int(videos[0]["clen"]) + (min(audios) if audios else 0)
+
+
+def select_format(info: dict, max_side=MAX_SHORT_SIDE, max_bytes=MAX_VIDEO_BYTES,
+                  bandwidth=BANDWIDTH, max_seconds=MAX_DOWNLOAD_SECONDS):
+    """
+    Pick the formatStream to download: among those within the storage and
+    bandwidth budget, the highest resolution up to max_side, then the
+    preferred codec, then the smallest known file. If none fit, the smallest.
+    """
+    def score(fmt):
+        size = estimate_size(fmt, info)
+        within = size is None or (size <= max_bytes and size * 8 / bandwidth <= max_seconds)
+        if not within:
+            # Nothing may fit, then the smallest file is the best we can do
+            return (False, -size, 0, 0)
+        side = _short_side(fmt) or 0
+        # An unknown size can't be checked against the budget, so it ranks after every known one
+        return (True, min(side, max_side), _codec_rank(fmt), float("-inf") if size is None else -size)
+
+    return max(info["formatStreams"], key=score)
+
+
+def save_video(id: str, dir: str, stats=None, library=None):
+    """ Save the video from the given the video id to <dir>/<id>.mp4, and index it in library """
+
+    response = pool.get(f"/api/v1/videos/{id}")
     x = json.loads(response.text)
 
-    url = x["formatStreams"][-1]["url"]
+    fmt = select_format(x)
+    url = fmt["url"]
     title = x["title"]
 
-    data = requests.get(url).content
-
-    # folder = os.path(dir)
-    name = title + ".mp4"
-    path = os.path.join(dir, name)
+    # Named after the id, titles can collide or contain path characters
+    path = video_path_for(dir, id)
 
     if not os.path.exists(dir):
         print(f"{dir} does not exist.")
         return
 
-    with open(path, "wb") as writer:
-        writer.write(data)
+    # Resumes from videos/<id>.mp4.part if an earlier attempt was cut off
+    downloader.download(url, path)
+    size = os.path.getsize(path)
+
+    if library is not None:
+        library.put({
+            "id": id,
+            "title": title,
+            "duration": int(x.get("lengthSeconds") or 0),
+            "size": size,
+            "resolution": fmt.get("size") or fmt.get("qualityLabel") or "",
+            "video_path": path,
+        })
+
+    try:
+        save_thumbnail(id, dir, x, library)
+    except Exception as e:
+        print(f"Could not save the thumbnail of video {id}: {e}")
+
+    if stats is not None:
+        # What the old choice, the last formatStream, would have cost
+        baseline = estimate_size(x["formatStreams"][-1], x)
+        stats.count(size, size if baseline is None else baseline)
 
     return path
 
 
-def download_func(n: str, id: str, video_dir: str):
+def download_func(n: str, id: str, video_dir: str, stats=None, library=None):
     print(f"Downloading video {n + 1}...")
-    filename = save_video(id, video_dir)
+    filename = save_video(id, video_dir, stats, library)
     print(f"Finished downloading video {n + 1}.")
     return filename
 
 
-def download_videos(search: str, num_videos: str, video_dir: str):
-    """ Download multiple videos at once """
-
+def extract_audio_func(download_future, on_video=None, library=None):
+    """ Post-download stage: cache the audio track of a finished download, then hand it to on_video """
+    if download_future.exception() is not None or not download_future.result():
+        return
+    path = download_future.result()
+    try:
+        audio_path = audio_cache.ensure_audio(path)
+        if library is not None:
+            library.set_audio(video_id_for(path), audio_path)
+    except Exception as e:
+        print(f"Could not extract audio for {path}: {e}")
+    if on_video is not None:
+        on_video(path)
+
+
+def download_videos(search: str, num_videos: str, video_dir: str, on_video=None):
+    """
+    Download multiple videos at once, skipping those already in the library.
+    on_video(path) is called from a worker thread as soon as each video is ready to play.
+    One failed video doesn't stop the others; returns (paths downloaded, {id: error} of the failures).
+    """
+
+    pool.check_health_if_stale()
     print(f"Getting the first {num_videos} search results...")
     ids = get_search_results(search, num_videos)
 
@@ -85,11 +360,36 @@ def download_videos(search: str, num_videos: str, video_dir: str):
         print(f"{video_dir} does not exist. Creating {video_dir}")
         os.mkdir(video_dir)
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        filenames = list(executor.map(download_func, range(len(ids)), ids, itertools.repeat(video_dir)))
-
-    print("Finished downloading!")
-    return filenames
+    library = ShortsLibrary(video_dir)
+    new_ids = [id for id in ids if id not in library]
+    if len(new_ids) < len(ids):
+        print(f"Skipping {len(ids) - len(new_ids)} videos already downloaded")
+    ids = new_ids
+
+    stats = FormatStats()
+
+    # Audio is extracted as each video lands, while the others keep downloading
+    # (the download pool is listed last so it shuts down, callbacks included, first)
+    with ThreadPoolExecutor(max_workers=2) as audio_executor, ThreadPoolExecutor(max_workers=10) as executor:
+        futures = [executor.submit(download_func, n, id, video_dir, stats, library) for n, id in enumerate(ids)]
+        for future in futures:
+            future.add_done_callback(lambda f: audio_executor.submit(extract_audio_func, f, on_video, library))
+        filenames, failed = [], {}
+        for id, future in zip(ids, futures):
+            try:
+                filename = future.result()
+            except Exception as e:
+                print(f"Could not download video {id}: {e}")
+                failed[id] = str(e)
+                continue
+            if filename:
+                filenames.append(filename)
+
+    print(f"Finished downloading! {len(filenames)} downloaded, {len(failed)} failed")
+    print(stats)
+    print(pool.summary())
+    print(http_client.latency_summary())
+    return filenames, failed
 
 
 def main():
@@ -100,7 +400,8 @@ def main():
     search = input("Enter your search: ")
     num_videos = int(input("Enter number of videos: "))
 
-    print(download_videos(search, num_videos, video_dir))
+    filenames, failed = download_videos(search, num_videos, video_dir)
+    print(filenames)
 
 
 if __name__ == "__main__":